@@ -0,0 +1,312 @@
+# Accelerated life test (ALT) fitting: one Weibull shape beta shared by every
+# stress level, with the scale alpha a function of the stress S.
+#
+# The life-stress models follow reliability.ALT_fitters:
+#
+#   Exponential (Arrhenius)   alpha = b * exp(a / S)
+#   Eyring                    alpha = (1 / S) * exp(-(c - a / S))
+#   Power                     alpha = a * S ** n
+#
+# All three are linear in log alpha,
+#
+#   log alpha = theta0 + theta1 * x(S) + offset(S),
+#
+# with x = 1/S, 1/S and log S and an offset of -log S for Eyring only. The
+# censored log-likelihood over all units,
+#
+#   sum w * [e * (log beta - log t + beta * u) - exp(beta * u)],
+#   u = log t - log alpha(S),
+#
+# and its gradient and Hessian in (theta0, theta1, log beta) are evaluated as
+# array expressions over the units and maximized with scipy's trust-region
+# Newton method. x is standardized internally so the problem is well
+# conditioned whatever the units of S. Start values come from the per-level
+# Weibull fits of groupfit.fit_weibull_codes, whose log scales are regressed
+# on x.
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+from scipy.special import ndtri
+
+from groupfit import fit_weibull_codes
+
+MODELS = ("Exponential", "Eyring", "Power")
+
+ALTFit = namedtuple(
+    "ALTFit",
+    [
+        "model",
+        "params",
+        "beta",
+        "theta",
+        "covariance",
+        "loglik",
+        "AIC",
+        "BIC",
+        "n",
+        "n_failures",
+        "n_iter",
+        "converged",
+    ],
+)
+ALTFit.__doc__ = """
+Result of fit_alt.
+
+params holds the model's parameters under reliability's names (a and b,
+a and c, or a and n) and beta the common shape. theta is (theta0, theta1,
+beta) and covariance the inverse observed information in theta.
+"""
+
+Life = namedtuple("Life", ["estimate", "lower", "upper"])
+
+
+def _design(model, stress):
+    # x(S) and offset(S) of the linear log alpha.
+    stress = np.asarray(stress, dtype=np.float64)
+    if np.any(stress <= 0):
+        raise ValueError("Stresses must be positive (use kelvin for temperatures).")
+    if model == "Exponential":
+        return 1.0 / stress, np.zeros_like(stress)
+    if model == "Eyring":
+        return 1.0 / stress, -np.log(stress)
+    if model == "Power":
+        return np.log(stress), np.zeros_like(stress)
+    raise ValueError(f"Unknown model: {model}. Choose from {MODELS}.")
+
+
+def _params(model, theta0, theta1):
+    if model == "Exponential":
+        return {"a": theta1, "b": float(np.exp(theta0))}
+    if model == "Eyring":
+        return {"a": theta1, "c": -theta0}
+    return {"a": float(np.exp(theta0)), "n": theta1}
+
+
+def _negative_loglik(p, logt, event, weight, xs, offset):
+    # Negative log-likelihood, gradient and Hessian in (theta0, theta1,
+    # log beta) with x standardized.
+    theta0, theta1, s = p
+    beta = np.exp(s)
+    u = logt - (theta0 + theta1 * xs + offset)
+    bu = beta * u
+    z = weight * np.exp(np.minimum(bu, 700.0))
+    we = weight * event
+    r = we.sum()
+
+    loglik = r * s + np.dot(we, bu - logt) - z.sum()
+
+    # Derivatives with respect to log alpha (eta) and beta per unit.
+    d_eta = beta * (z - we)
+    d_beta = r / beta + np.dot(we, u) - np.dot(z, u)
+    grad = np.array([d_eta.sum(), np.dot(d_eta, xs), beta * d_beta])
+
+    h_ee = -beta * beta * z
+    h_eb = (z - we) + bu * z
+    h_bb = -r / beta**2 - np.dot(z, u * u)
+    h_es = beta * h_eb
+    hess = np.empty((3, 3))
+    hess[0, 0] = h_ee.sum()
+    hess[0, 1] = hess[1, 0] = np.dot(h_ee, xs)
+    hess[1, 1] = np.dot(h_ee, xs * xs)
+    hess[0, 2] = hess[2, 0] = h_es.sum()
+    hess[1, 2] = hess[2, 1] = np.dot(h_es, xs)
+    hess[2, 2] = beta * beta * h_bb + beta * d_beta
+    return -loglik, -grad, -hess
+
+
+def _start(logt, event, weight, xs, offset, stress):
+    # Weibull fits per stress level, their log scales regressed on x.
+    levels, first, codes = np.unique(stress, return_index=True, return_inverse=True)
+    fits = fit_weibull_codes(codes, np.exp(logt), event, levels.size, weights=weight)
+    ok = np.isfinite(fits["alpha"].to_numpy())
+    if ok.sum() < 2:
+        raise ValueError("At least two stress levels need failures to fit an ALT model.")
+    r = fits["n_failures"].to_numpy()[ok]
+    y = np.log(fits["alpha"].to_numpy()[ok]) - offset[first][ok]
+    slope, intercept = np.polyfit(xs[first][ok], y, 1, w=np.sqrt(r))
+    beta = np.average(fits["beta"].to_numpy()[ok], weights=r)
+    return np.array([intercept, slope, np.log(beta)])
+
+
+def fit_alt(
+    failures,
+    failure_stress,
+    right_censored=None,
+    right_censored_stress=None,
+    model="Exponential",
+    weights=None,
+):
+    """
+    Fits a Weibull life-stress model to failures at several stress levels.
+
+    Parameters:
+    failures (array_like): Failure times.
+    failure_stress (array_like): Stress of each failure (kelvin for the
+    Exponential and Eyring models).
+    right_censored (array_like or None): Right censored times.
+    right_censored_stress (array_like or None): Stress of each censored unit.
+    model (str): "Exponential" (Arrhenius), "Eyring" or "Power".
+    weights (array_like or None): Units per row, failures first and then
+    right censored rows.
+
+    Returns:
+    ALTFit
+    """
+    failures = np.asarray(failures, dtype=np.float64).ravel()
+    if (right_censored is None) != (right_censored_stress is None):
+        raise ValueError("right_censored and right_censored_stress must be given together.")
+    if right_censored is None:
+        right_censored, right_censored_stress = np.empty(0), np.empty(0)
+    right_censored = np.asarray(right_censored, dtype=np.float64).ravel()
+    failure_stress = np.broadcast_to(np.asarray(failure_stress, dtype=np.float64), failures.shape)
+    right_censored_stress = np.broadcast_to(
+        np.asarray(right_censored_stress, dtype=np.float64), right_censored.shape
+    )
+    times = np.concatenate((failures, right_censored))
+    stress = np.concatenate((failure_stress, right_censored_stress))
+    event = np.concatenate((np.ones(failures.size), np.zeros(right_censored.size)))
+    weight = np.ones(times.size) if weights is None else np.asarray(weights, dtype=np.float64).ravel()
+    if weight.size != times.size:
+        raise ValueError("weights must have one entry per failure and right censored row.")
+    if np.any(times <= 0):
+        raise ValueError("All failure and right censored times must be positive.")
+
+    x, offset = _design(model, stress)
+    center, spread = x.mean(), x.std()
+    spread = spread if spread > 0 else 1.0
+    xs = (x - center) / spread
+    logt = np.log(times)
+
+    start = _start(logt, event, weight, xs, offset, stress)
+    opt = minimize(
+        lambda p: _negative_loglik(p, logt, event, weight, xs, offset)[:2],
+        start,
+        jac=True,
+        hess=lambda p: _negative_loglik(p, logt, event, weight, xs, offset)[2],
+        method="trust-exact",
+        options={"gtol": 1e-8},
+    )
+    p0, p1, s = opt.x
+    beta = float(np.exp(s))
+    theta1 = p1 / spread
+    theta0 = p0 - theta1 * center
+
+    # Covariance in (theta0, theta1, beta) from the standardized solution.
+    _, _, hess = _negative_loglik(opt.x, logt, event, weight, xs, offset)
+    jacobian = np.array([[1.0, -center / spread, 0.0], [0.0, 1.0 / spread, 0.0], [0.0, 0.0, beta]])
+    covariance = jacobian @ np.linalg.inv(hess) @ jacobian.T
+
+    n = weight.sum()
+    loglik = -float(opt.fun)
+    return ALTFit(
+        model=model,
+        params=_params(model, float(theta0), float(theta1)),
+        beta=beta,
+        theta=np.array([theta0, theta1, beta]),
+        covariance=covariance,
+        loglik=loglik,
+        AIC=6 - 2 * loglik,
+        BIC=3 * np.log(n) - 2 * loglik,
+        n=int(n),
+        n_failures=int(np.dot(weight, event)),
+        n_iter=int(opt.nit),
+        converged=bool(opt.success),
+    )
+
+
+def scale(fit, stress):
+    """
+    Weibull scale alpha at the given stresses.
+    """
+    x, offset = _design(fit.model, stress)
+    return np.exp(fit.theta[0] + fit.theta[1] * x + offset)
+
+
+def reliability(fit, t, stress):
+    """
+    Reliability at times t under the given stresses, broadcasting t against
+    stress.
+    """
+    t = np.asarray(t, dtype=np.float64)
+    return np.exp(-((t / scale(fit, stress)) ** fit.beta))
+
+
+def b_life(fit, stress, percent=10, ci=0.95):
+    """
+    B-life (time by which percent of the units have failed) at a stress,
+    with delta method bounds on its logarithm.
+
+    Parameters:
+    fit (ALTFit): The fitted model.
+    stress (array_like): Stress, e.g. the use level.
+    percent (float): 10 gives the B10 life.
+    ci (float): Two-sided confidence level of the bounds.
+
+    Returns:
+    Life: estimate, lower and upper, shaped like stress.
+    """
+    x, offset = _design(fit.model, stress)
+    theta0, theta1, beta = fit.theta
+    q = np.log(-np.log1p(-percent / 100.0))
+    log_life = theta0 + theta1 * x + offset + q / beta
+    # Gradient of log_life in (theta0, theta1, beta).
+    grad = np.stack(np.broadcast_arrays(1.0, x, -q / beta**2), axis=-1)
+    se = np.sqrt(np.einsum("...i,ij,...j->...", grad, fit.covariance, grad))
+    z = ndtri(0.5 + ci / 2)
+    return Life(np.exp(log_life), np.exp(log_life - z * se), np.exp(log_life + z * se))
+
+
+def fit_all(failures, failure_stress, right_censored=None, right_censored_stress=None, use_level_stress=None):
+    """
+    Fits every model in MODELS and ranks them by AIC.
+
+    Returns:
+    DataFrame: One row per model with beta, the model parameters, loglik,
+    AIC, BIC and, when use_level_stress is given, the B10 life there.
+    """
+    rows = []
+    for model in MODELS:
+        try:
+            fit = fit_alt(failures, failure_stress, right_censored, right_censored_stress, model)
+        except (ValueError, np.linalg.LinAlgError) as exc:
+            rows.append({"model": model, "error": str(exc)})
+            continue
+        row = {"model": model, "beta": fit.beta, **fit.params}
+        row.update(loglik=fit.loglik, AIC=fit.AIC, BIC=fit.BIC)
+        if use_level_stress is not None:
+            row["B10_use"] = float(b_life(fit, use_level_stress).estimate)
+        rows.append(row)
+    return pd.DataFrame(rows).sort_values("AIC", na_position="last").set_index("model")
+
+
+def main():
+    """
+    Fits a simulated three-temperature test and extrapolates to 300 K.
+    """
+    import time
+
+    rng = np.random.default_rng(0)
+    a, b, beta = 2000.0, 5.0, 2.5
+    stresses = np.repeat([350.0, 380.0, 410.0], 3334)[:10_000]
+    life = b * np.exp(a / stresses) * rng.weibull(beta, stresses.size)
+    end_of_test = 1500.0
+    failed = life < end_of_test
+
+    start = time.perf_counter()
+    fit = fit_alt(life[failed], stresses[failed], np.full((~failed).sum(), end_of_test), stresses[~failed])
+    elapsed = time.perf_counter() - start
+    print(f"{stresses.size} units, {fit.n_failures} failures, fitted in {elapsed * 1e3:.0f} ms")
+    print(f"a = {fit.params['a']:.1f}, b = {fit.params['b']:.3f}, beta = {fit.beta:.3f}")
+
+    use = 300.0
+    b10 = b_life(fit, use)
+    print(f"B10 at {use} K: {b10.estimate:.0f} h ({b10.lower:.0f}, {b10.upper:.0f})")
+    print(f"R(5000 h) at {use} K: {reliability(fit, 5000, use):.4f}")
+    print(fit_all(life[failed], stresses[failed], np.full((~failed).sum(), end_of_test), stresses[~failed], use))
+
+
+if __name__ == "__main__":
+    main()
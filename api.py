@@ -0,0 +1,202 @@
+# JSON API for the reliability metrics, registered on the app in fr.py.
+#
+# POST /api/analyze takes many analyses in one request body:
+#
+#   {"analyses": [
+#       {"units": 20, "operational_time": 1000, "warranty_period": 200,
+#        "failing_times": [550, 480, 680]},
+#       {"times": [550, 480, 1000, 1000], "censored": [0, 0, 1, 1],
+#        "warranty_period": 200}
+#   ]}
+#
+# The first form mirrors the HTML form: the units that did not fail are
+# treated as right censored at operational_time. The second gives every
+# unit's time directly with a censoring flag, and optionally "weights", the
+# number of units each time stands for. Python callers of analyze_batch can
+# also pass {"data": <LifeData>, "warranty_period": ...}. The metrics for all analyses
+# are computed with the batch functions in failurerate.py and all the Weibull
+# fits are solved together by groupfit.
+#
+# The response is {"results": [...]} in request order, or one JSON object per
+# line (NDJSON) when the client sends Accept: application/x-ndjson or
+# ?stream=1. Streamed batches are processed in chunks so the first lines go
+# out before the whole batch is done.
+
+import json
+
+import numpy as np
+from flask import Blueprint, Response, jsonify, request
+
+from failurerate import (
+    calculate_exp_reliability_batch,
+    calculate_failure_rate_batch,
+    calculate_mtbf_batch,
+    calculate_weibull_reliability_batch,
+)
+from lifedata import LifeData
+from stagetimer import stage
+
+
+api = Blueprint("api", __name__, url_prefix="/api")
+
+# Slope used for the "Weibull reliability rate", as on the HTML results page.
+SCALE_PARAM = 2
+
+STREAM_CHUNK = 1000
+
+
+def _normalize(item):
+    """
+    Converts one analysis request into (times, events, weights,
+    warranty_period, slope).
+    """
+    warranty_period = float(item["warranty_period"])
+    slope = float(item.get("slope", SCALE_PARAM))
+    if "data" in item:
+        data = item["data"]
+        if not isinstance(data, LifeData):
+            raise TypeError("data must be a LifeData")
+        times, events, weights = data.right_censored_arrays()
+    elif "times" in item:
+        times = np.asarray(item["times"], dtype=np.float64)
+        censored = np.asarray(item.get("censored", np.zeros(times.size)), dtype=bool)
+        if censored.shape != times.shape:
+            raise ValueError("times and censored must have the same length")
+        weights = item.get("weights")
+        times, events, weights = LifeData(times, ~censored, weights).right_censored_arrays()
+    else:
+        failing_times = np.asarray(item["failing_times"], dtype=np.float64)
+        passing_units = int(item["units"]) - failing_times.size
+        if passing_units < 0:
+            raise ValueError("more failing_times than units")
+        times = np.concatenate(
+            (failing_times, np.full(passing_units, float(item["operational_time"])))
+        )
+        events = np.concatenate((np.ones(failing_times.size), np.zeros(passing_units)))
+        weights = np.ones(times.size)
+    if times.size == 0:
+        raise ValueError("no units to analyze")
+    if np.any(times <= 0):
+        raise ValueError("times must be positive")
+    return times, events, weights, warranty_period, slope
+
+
+def _finite(value):
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+
+def analyze_batch(analyses):
+    """
+    Calculates the reliability metrics and Weibull fit for many analyses.
+
+    Parameters:
+    analyses (list): Analysis dicts as described at the top of this module.
+
+    Returns:
+    list: One result dict per analysis, in order. Values that are infinite
+    or undefined (MTBF without failures, a fit without failures or that did
+    not converge) are None.
+
+    Raises:
+    ValueError: If an analysis is malformed. The message names its index.
+    """
+    parsed = []
+    with stage("parse"):
+        for i, item in enumerate(analyses):
+            try:
+                parsed.append(_normalize(item))
+            except (KeyError, TypeError, ValueError) as exc:
+                raise ValueError(f"analyses[{i}]: {exc!r}") from exc
+    if not parsed:
+        return []
+
+    rows = np.array([p[0].size for p in parsed])
+    times = np.concatenate([p[0] for p in parsed])
+    events = np.concatenate([p[1] for p in parsed])
+    weights = np.concatenate([p[2] for p in parsed])
+    codes = np.repeat(np.arange(len(parsed)), rows)
+    warranty = np.array([p[3] for p in parsed])
+    slope = np.array([p[4] for p in parsed])
+
+    with stage("metrics"):
+        sizes = np.bincount(codes, weights=weights, minlength=len(parsed))
+        total_op_time = np.bincount(codes, weights=weights * times, minlength=len(parsed))
+        n_failures = np.bincount(codes, weights=weights * events, minlength=len(parsed))
+        failure_rate = calculate_failure_rate_batch(total_op_time, n_failures)
+        mtbf = calculate_mtbf_batch(total_op_time, n_failures)
+        exp_rel = calculate_exp_reliability_batch(failure_rate, warranty)
+        wb_rel = calculate_weibull_reliability_batch(failure_rate, warranty, slope)
+
+    # groupfit brings in pandas; import it on first use rather than at app
+    # startup.
+    from groupfit import fit_weibull_codes
+
+    with stage("fit"):
+        fits = fit_weibull_codes(codes, times, events, len(parsed), weights=weights)
+    alpha = fits["alpha"].to_numpy()
+    beta = fits["beta"].to_numpy()
+    # Groups without failures, or whose fit did not converge (e.g. a single
+    # distinct failure time), get no weibull_fit.
+    converged = fits["converged"].to_numpy() & np.isfinite(alpha) & np.isfinite(beta)
+    fitted_rel = np.exp(-((warranty / alpha) ** beta))
+
+    results = []
+    for i in range(len(parsed)):
+        weibull = None
+        if converged[i]:
+            weibull = {
+                "alpha": float(alpha[i]),
+                "beta": float(beta[i]),
+                "alpha_SE": _finite(fits["alpha_SE"].iat[i]),
+                "beta_SE": _finite(fits["beta_SE"].iat[i]),
+                "loglik": float(fits["loglik"].iat[i]),
+                "converged": bool(fits["converged"].iat[i]),
+                "reliability": float(fitted_rel[i]),
+            }
+        results.append(
+            {
+                "units": int(sizes[i]),
+                "failing_units": int(n_failures[i]),
+                "total_op_time": float(total_op_time[i]),
+                "warranty_period": float(warranty[i]),
+                "failure_rate": float(failure_rate[i]),
+                "mtbf": _finite(mtbf[i]),
+                "exp_reliability": float(exp_rel[i]),
+                "weibull_reliability": float(wb_rel[i]),
+                "weibull_fit": weibull,
+            }
+        )
+    return results
+
+
+def _stream(analyses):
+    for start in range(0, len(analyses), STREAM_CHUNK):
+        try:
+            chunk = analyze_batch(analyses[start : start + STREAM_CHUNK])
+        except ValueError as exc:
+            # Headers are already sent, so report the error in-band and stop.
+            yield json.dumps({"error": f"chunk starting at {start}: {exc}"}) + "\n"
+            return
+        for result in chunk:
+            yield json.dumps(result) + "\n"
+
+
+@api.route("/analyze", methods=["POST"])
+def analyze():
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not isinstance(payload.get("analyses"), list):
+        return jsonify(error='expected a JSON object with an "analyses" list'), 400
+    analyses = payload["analyses"]
+
+    stream = request.args.get("stream") == "1" or (
+        request.accept_mimetypes.best == "application/x-ndjson"
+    )
+    if stream:
+        return Response(_stream(analyses), mimetype="application/x-ndjson")
+
+    try:
+        results = analyze_batch(analyses)
+    except ValueError as exc:
+        return jsonify(error=str(exc)), 400
+    return jsonify(results=results)
@@ -0,0 +1,233 @@
+# Benchmark suite for the metric functions, the Weibull fitters, the
+# lifelines model set, graph rendering and the Flask form route.
+#
+#   python benchsuite.py                        run everything, print JSON
+#   python benchsuite.py --quick fit_2p         sizes up to 10^4, names
+#                                               containing "fit_2p"
+#   python benchsuite.py --history bench.jsonl --baseline baseline.json
+#
+# Each benchmark is timed over --repeat runs (after one warm-up run) and
+# reports the median and best wall time, items per second, and the peak
+# memory allocated through Python during one extra run under tracemalloc (kept
+# separate because tracing slows the code down). Every history record carries
+# the versions of numpy, scipy, reliability, lifelines, matplotlib and flask
+# so a regression can be tied to a dependency upgrade. --history, --baseline
+# and --tolerance work as in startupbench.py, on the median time: --baseline
+# exits with status 1 if any benchmark got slower than --tolerance allows.
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from importlib import metadata
+
+import numpy as np
+
+from startupbench import add_history_arguments, save_and_check
+
+# Run fr.generate_graphs inline so the benchmark measures rendering rather
+# than process pool start-up.
+os.environ.setdefault("WEIBULL_WORKERS", "0")
+
+SIZES = [10, 100, 1_000, 10_000, 100_000, 1_000_000]
+QUICK_MAX_SIZE = 10_000
+
+# Sizes above this are skipped for reliability.Fitters, which take minutes.
+RELIABILITY_MAX_SIZE = 10_000
+
+PACKAGES = ["numpy", "scipy", "pandas", "reliability", "lifelines", "matplotlib", "flask"]
+
+
+def _sample(n, censored, seed=0):
+    # Weibull(alpha=1000, beta=2) lifetimes; with censoring, units still
+    # running at 1000 hours (about 37% of them) are right censored.
+    rng = np.random.default_rng(seed)
+    times = 1000 * rng.weibull(2.0, n)
+    if not censored:
+        return times, None
+    return times[times <= 1000], np.full(int((times > 1000).sum()), 1000.0)
+
+
+def _metrics_benchmarks(sizes):
+    import failurerate
+
+    yield "calculate_scalar", 4, lambda: (
+        failurerate.calculate_failure_rate(17980, 6),
+        failurerate.calculate_mtbf(17980, 6),
+        failurerate.calculate_exp_reliability(3.3e-4, 200),
+        failurerate.calculate_weibull_reliability(3.3e-4, 200, 2),
+    )
+    for n in sizes:
+        rng = np.random.default_rng(0)
+        op_time = rng.uniform(1e3, 1e5, n)
+        failures = rng.integers(0, 10, n)
+
+        def batch(op_time=op_time, failures=failures):
+            rate = failurerate.calculate_failure_rate_batch(op_time, failures)
+            failurerate.calculate_mtbf_batch(op_time, failures)
+            failurerate.calculate_exp_reliability_batch(rate, 200)
+            failurerate.calculate_weibull_reliability_batch(rate, 200, 2)
+
+        yield f"calculate_batch[n={n}]", n, batch
+
+
+def _fit_benchmarks(sizes):
+    from weibullfit import fit_weibull_2p, fit_weibull_3p
+
+    for n in sizes:
+        for censored in (False, True):
+            failures, right_censored = _sample(n, censored)
+            tag = f"n={n},censored={censored}"
+            yield f"fit_2p[{tag}]", n, lambda f=failures, c=right_censored: fit_weibull_2p(f, c)
+            yield f"fit_3p[{tag}]", n, lambda f=failures, c=right_censored: fit_weibull_3p(f, c)
+            if n <= RELIABILITY_MAX_SIZE:
+                yield f"reliability_fit_2p[{tag}]", n, lambda f=failures, c=right_censored: (
+                    _reliability_fit("Fit_Weibull_2P", f, c)
+                )
+
+
+def _reliability_fit(name, failures, right_censored):
+    from reliability import Fitters
+
+    return getattr(Fitters, name)(
+        failures=failures,
+        right_censored=right_censored,
+        show_probability_plot=False,
+        print_results=False,
+    )
+
+
+def _lifelines_benchmarks():
+    from lifelines.datasets import load_waltons
+
+    from modelcompare import MODELS
+
+    df = load_waltons()
+    T, E = df["T"].to_numpy(), df["E"].to_numpy()
+    for name, factory in MODELS.items():
+        yield f"lifelines[{name}]", T.size, lambda f=factory: f(T, E).fit(T, E)
+
+
+def _app_benchmarks():
+    import fr
+
+    failing_times = [550, 480, 680, 790, 860, 620]
+    for fmt in ("png", "svg", "json"):
+        yield f"generate_graphs[{fmt}]", 1, lambda fmt=fmt: fr.generate_graphs(failing_times, fmt)
+
+    client = fr.app.test_client()
+    form = {
+        "units": 20,
+        "operational_time": 1000,
+        "failing_times": ",".join(map(str, failing_times)),
+        "warranty_period": 200,
+    }
+
+    def post(cached):
+        if not cached:
+            fr.cache.clear()
+        response = client.post("/", data=form)
+        assert response.status_code == 200
+
+    yield "post_index[cold]", 1, lambda: post(False)
+    yield "post_index[cached]", 1, lambda: post(True)
+
+
+def benchmarks(quick=False):
+    """
+    Yields (name, items, function) for every benchmark. items is the number
+    of observations (or requests) one call processes.
+    """
+    sizes = [n for n in SIZES if not quick or n <= QUICK_MAX_SIZE]
+    yield from _metrics_benchmarks(sizes)
+    yield from _fit_benchmarks(sizes)
+    yield from _lifelines_benchmarks()
+    yield from _app_benchmarks()
+
+
+def measure(function, items, repeat=5, max_time=10.0):
+    """
+    Times function and measures its peak traced memory.
+
+    repeat is reduced for slow functions so that one benchmark takes roughly
+    max_time seconds at most (but always runs at least once after warm-up).
+
+    Returns:
+    dict: median_ms, min_ms, runs, throughput (items per second) and
+    peak_kib.
+    """
+    start = time.perf_counter()
+    function()
+    warm_up = time.perf_counter() - start
+    runs = max(1, min(repeat, int(max_time / max(warm_up, 1e-9))))
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    median = statistics.median(times)
+    return {
+        "median_ms": median * 1e3,
+        "min_ms": min(times) * 1e3,
+        "runs": runs,
+        "throughput": items / median if median > 0 else float("inf"),
+        "peak_kib": peak / 1024,
+    }
+
+
+def versions():
+    found = {"python": sys.version.split()[0]}
+    for name in PACKAGES:
+        try:
+            found[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            found[name] = None
+    return found
+
+
+def run(filters=(), quick=False, repeat=5, max_time=10.0, log=sys.stderr):
+    """
+    Runs the benchmarks whose names contain any of filters (all if empty).
+
+    Returns:
+    dict: Benchmark name -> the result of measure().
+    """
+    results = {}
+    for name, items, function in benchmarks(quick):
+        if filters and not any(f in name for f in filters):
+            continue
+        results[name] = measure(function, items, repeat, max_time)
+        if log is not None:
+            r = results[name]
+            print(f"{name}: {r['median_ms']:.3f} ms, {r['peak_kib']:.0f} KiB", file=log)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite.")
+    parser.add_argument("filters", nargs="*", help="only run benchmarks containing these")
+    parser.add_argument("--quick", action="store_true", help=f"sizes up to {QUICK_MAX_SIZE}")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-time", type=float, default=10.0, help="seconds per benchmark")
+    add_history_arguments(parser)
+    args = parser.parse_args()
+
+    results = run(args.filters, args.quick, args.repeat, args.max_time)
+    record = {"timestamp": time.time(), "versions": versions(), "results": results}
+    print(json.dumps(record, indent=2))
+    save_and_check(args, record, "median_ms", decimals=3)
+
+
+if __name__ == "__main__":
+    main()
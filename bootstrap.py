@@ -0,0 +1,241 @@
+# Bootstrap and likelihood-ratio confidence intervals for Weibull 2P fits,
+# for small samples where Fisher-matrix bounds (confbounds.py) are unreliable.
+#
+# Bootstrap replicates are drawn as one 2-D array of resampled indices per
+# shard and every replicate in a shard is fitted together by weibullfit's
+# lockstep solver. Shards have a fixed size and each gets its own child of a
+# numpy SeedSequence, so the replicates (and the intervals) depend only on the
+# seed, never on how many worker processes ran the shards.
+#
+# Likelihood-ratio intervals invert the profile likelihood: the interval for a
+# quantity Q is the set of values whose profile log-likelihood lies within
+# chi2(1, CI) / 2 of the maximum. Q is alpha, beta, the B10 life or the
+# reliability at the warranty period.
+
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import brentq, minimize_scalar
+from scipy.stats import chi2
+
+from weibullfit import _pack, _profile_mle, fit_weibull_2p
+
+
+def _derived(alpha, beta, warranty_period):
+    quantities = {
+        "alpha": alpha,
+        "beta": beta,
+        "B10": alpha * (-np.log(0.9)) ** (1 / beta),
+    }
+    if warranty_period is not None:
+        quantities["reliability"] = np.exp(-((warranty_period / alpha) ** beta))
+    return quantities
+
+
+def _fit_shard(times, events, n_replicates, seed_sequence):
+    """
+    Draws n_replicates nonparametric bootstrap samples and fits them all.
+
+    Returns:
+    tuple: (alpha, beta) arrays, nan for replicates without an estimate.
+    """
+    rng = np.random.default_rng(seed_sequence)
+    n = times.size
+    index = rng.integers(0, n, size=(n_replicates, n))
+    codes = np.repeat(np.arange(n_replicates), n)
+    res = _profile_mle(
+        np.log(times)[index].ravel(),
+        events[index].ravel(),
+        np.ones(index.size),
+        codes,
+        n_replicates,
+    )
+    return res["alpha"], res["beta"]
+
+
+def bootstrap_replicates(
+    failures, right_censored=None, n_boot=2000, seed=None, shard_size=500, max_workers=1
+):
+    """
+    Fits a Weibull 2P distribution to nonparametric bootstrap resamples.
+
+    Parameters:
+    failures (array_like): Failure times.
+    right_censored (array_like or None): Right censored times.
+    n_boot (int): Number of bootstrap replicates.
+    seed (int or None): Seed for numpy.random.SeedSequence.
+    shard_size (int): Replicates per shard. Changing it changes the random
+    streams; the number of workers does not.
+    max_workers (int or None): Worker processes. 1 runs the shards inline.
+
+    Returns:
+    tuple: (alpha, beta) arrays of length n_boot. Replicates that drew no
+    failures, or fewer than two distinct failure times, are nan.
+    """
+    times, events = _pack(failures, right_censored)
+    n_shards = math.ceil(n_boot / shard_size)
+    children = np.random.SeedSequence(seed).spawn(n_shards)
+    sizes = [min(shard_size, n_boot - i * shard_size) for i in range(n_shards)]
+    args = [(times, events, size, child) for size, child in zip(sizes, children)]
+
+    if max_workers == 1:
+        results = [_fit_shard(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(_fit_shard, *zip(*args)))
+    return (
+        np.concatenate([r[0] for r in results]),
+        np.concatenate([r[1] for r in results]),
+    )
+
+
+def bootstrap_intervals(
+    failures,
+    right_censored=None,
+    CI=0.95,
+    warranty_period=None,
+    n_boot=2000,
+    seed=None,
+    shard_size=500,
+    max_workers=1,
+):
+    """
+    Percentile bootstrap intervals for alpha, beta, B10 life and (optionally)
+    the reliability at the warranty period.
+
+    Parameters:
+    failures (array_like): Failure times.
+    right_censored (array_like or None): Right censored times.
+    CI (float): Two-sided confidence level.
+    warranty_period (float or None): Time at which to report reliability.
+    n_boot, seed, shard_size, max_workers: See bootstrap_replicates.
+
+    Returns:
+    DataFrame: Indexed by quantity, with the point estimate from the full
+    sample and the lower and upper bounds.
+    """
+    fit = fit_weibull_2p(failures, right_censored)
+    alpha, beta = bootstrap_replicates(
+        failures, right_censored, n_boot, seed, shard_size, max_workers
+    )
+    ok = np.isfinite(alpha)
+    point = _derived(fit.alpha, fit.beta, warranty_period)
+    boot = _derived(alpha[ok], beta[ok], warranty_period)
+    tail = (1 - CI) / 2 * 100
+    rows = {
+        name: {
+            "estimate": point[name],
+            "lower": np.percentile(values, tail),
+            "upper": np.percentile(values, 100 - tail),
+        }
+        for name, values in boot.items()
+    }
+    table = pd.DataFrame.from_dict(rows, orient="index")
+    table.attrs["n_valid"] = int(ok.sum())
+    return table
+
+
+def _loglik(log_alpha, beta, logt, events):
+    r = events.sum()
+    return (
+        r * np.log(beta)
+        - r * beta * log_alpha
+        + (beta - 1.0) * np.dot(events, logt)
+        - np.exp(beta * (logt - log_alpha)).sum()
+    )
+
+
+def likelihood_ratio_intervals(failures, right_censored=None, CI=0.95, warranty_period=None):
+    """
+    Likelihood-ratio intervals for alpha, beta, B10 life and (optionally) the
+    reliability at the warranty period.
+
+    Parameters:
+    failures (array_like): Failure times.
+    right_censored (array_like or None): Right censored times.
+    CI (float): Two-sided confidence level.
+    warranty_period (float or None): Time at which to report reliability.
+
+    Returns:
+    DataFrame: Indexed by quantity, with the MLE and the lower and upper
+    bounds.
+    """
+    times, events = _pack(failures, right_censored)
+    logt = np.log(times)
+    fit = fit_weibull_2p(failures, right_censored)
+    ll_max = fit.loglik
+    cutoff = chi2.ppf(CI, 1) / 2
+    log_b = math.log(fit.beta)
+    r = events.sum()
+
+    def profile_beta(beta):
+        # alpha has a closed form for fixed beta.
+        log_alpha = (np.log(np.exp(beta * logt).sum() / r)) / beta
+        return _loglik(log_alpha, beta, logt, events)
+
+    def profile(log_alpha_of):
+        # Maximize over beta with alpha tied to the quantity by log_alpha_of.
+        def value(q):
+            opt = minimize_scalar(
+                lambda lb: -_loglik(log_alpha_of(q, math.exp(lb)), math.exp(lb), logt, events),
+                bounds=(log_b - 5, log_b + 5),
+                method="bounded",
+                options={"xatol": 1e-10},
+            )
+            return -opt.fun
+
+        return value
+
+    def invert(value, estimate, lower_limit=0.0, upper_limit=np.inf):
+        gap = lambda q: ll_max - value(q) - cutoff
+        bounds = []
+        for direction in (-1, 1):
+            step = 0.1
+            while True:
+                q = estimate * math.exp(direction * step)
+                q = min(max(q, lower_limit), upper_limit)
+                if gap(q) > 0:
+                    bounds.append(brentq(gap, *sorted((estimate, q)), xtol=1e-12 * estimate))
+                    break
+                if q in (lower_limit, upper_limit) or step > 50:
+                    bounds.append(q)
+                    break
+                step *= 2
+        return bounds
+
+    point = _derived(fit.alpha, fit.beta, warranty_period)
+    k10 = -math.log(0.9)
+    rows = {
+        "alpha": invert(profile(lambda q, b: math.log(q)), fit.alpha),
+        "beta": invert(profile_beta, fit.beta),
+        "B10": invert(profile(lambda q, b: math.log(q) - math.log(k10) / b), point["B10"]),
+    }
+    if warranty_period is not None:
+        w = warranty_period
+        rows["reliability"] = invert(
+            profile(lambda q, b: math.log(w) - math.log(-math.log(q)) / b),
+            point["reliability"],
+            upper_limit=1 - 1e-15,
+        )
+    table = pd.DataFrame.from_dict(rows, orient="index", columns=["lower", "upper"])
+    table.insert(0, "estimate", [point[name] for name in table.index])
+    return table
+
+
+def main():
+    """
+    Bootstrap and likelihood-ratio intervals for the 6 failures (14 units
+    surviving to 1000 hours) used in failurerate.py.
+    """
+    failing_times = [550, 480, 680, 790, 860, 620]
+    survivors = [1000] * 14
+    print("Bootstrap (percentile) 95% intervals:")
+    print(bootstrap_intervals(failing_times, survivors, warranty_period=200, seed=0))
+    print("\nLikelihood-ratio 95% intervals:")
+    print(likelihood_ratio_intervals(failing_times, survivors, warranty_period=200))
+
+
+if __name__ == "__main__":
+    main()
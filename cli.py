@@ -0,0 +1,211 @@
+# Command line entry point for the reliability tools in this repository.
+#
+#   python cli.py metrics --units 20 --operational-time 1000 \
+#       --failing-times 550,480,680,790,860,620 --warranty-period 200
+#   python cli.py fit 550,480,680,790,860,620 --censored 1000x14 --plot fit.png
+#   python cli.py fit --file failures.parquet --event-col censored --censored-flag
+#   python cli.py compare --file waltons.csv --duration-col T --event-col E
+#   python cli.py simulate --units 10000000 --alpha 1 --beta 2 --seed 42
+#
+# Only argparse, json and sys are imported up front. Every subcommand imports
+# what it needs when it runs, so `metrics` never loads pandas, scipy,
+# matplotlib, reliability or lifelines, and --help returns immediately.
+# startupbench.py tracks the import cost of each path.
+
+import argparse
+import json
+import sys
+
+
+def _times(text):
+    """
+    Parses a comma separated list of times. "1000x14" stands for fourteen
+    times of 1000.
+    """
+    values = []
+    for item in text.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        value, _, count = item.partition("x")
+        values.extend([float(value)] * (int(count) if count else 1))
+    return values
+
+
+def _print(result, as_json):
+    if as_json:
+        print(json.dumps(result, indent=2, default=float))
+    else:
+        for key, value in result.items():
+            print(f"{key}: {value}")
+
+
+def metrics(args):
+    from failurerate import (
+        calculate_exp_reliability,
+        calculate_failure_rate,
+        calculate_mtbf,
+        calculate_weibull_reliability,
+    )
+
+    failing_times = _times(args.failing_times)
+    failing_units = len(failing_times)
+    passing_units = args.units - failing_units
+    if passing_units < 0:
+        raise SystemExit("error: more failing times than units")
+    total_op_time = passing_units * args.operational_time + sum(failing_times)
+    failure_rate = calculate_failure_rate(total_op_time, failing_units)
+    return {
+        "failing_units": failing_units,
+        "passing_units": passing_units,
+        "total_op_time": total_op_time,
+        "failure_rate": failure_rate,
+        "mtbf": calculate_mtbf(total_op_time, failing_units),
+        "exp_reliability": calculate_exp_reliability(failure_rate, args.warranty_period),
+        "weibull_reliability": calculate_weibull_reliability(
+            failure_rate, args.warranty_period, args.slope
+        ),
+    }
+
+
+def fit(args):
+    if args.file:
+        if args.three_p or args.plot:
+            raise SystemExit("error: --file supports the streaming 2P fit only")
+        from ingest import fit_weibull_stream
+
+        result = fit_weibull_stream(
+            args.file,
+            time_col=args.time_col,
+            event_col=args.event_col,
+            event_is_censored=args.censored_flag,
+        )
+    else:
+        if not args.failures:
+            raise SystemExit("error: give failure times or --file")
+        from weibullfit import fit_weibull_2p, fit_weibull_3p
+
+        failures = _times(args.failures)
+        censored = _times(args.censored) if args.censored else None
+        fitter = fit_weibull_3p if args.three_p else fit_weibull_2p
+        result = fitter(failures, censored)
+        if args.plot:
+            from failurerate import plot_fit
+
+            plt = plot_fit(failures, result)
+            if args.plot == "-":
+                plt.show()
+            else:
+                plt.savefig(args.plot)
+    return result._asdict()
+
+
+def compare(args):
+    from modelcompare import compare_models
+
+    if args.file:
+        import pandas as pd
+
+        df = pd.read_csv(args.file)
+    else:
+        from lifelines.datasets import load_waltons
+
+        df = load_waltons()
+    table = compare_models(
+        df[args.duration_col], df[args.event_col], models=args.models, max_workers=args.workers
+    )
+    if args.json:
+        table = table.reset_index().astype(object)
+        return table.where(table.notna(), None).to_dict(orient="records")
+    print(table.to_string())
+    return None
+
+
+def simulate(args):
+    from fleetsim import simulate_fleet
+
+    result = simulate_fleet(
+        args.units,
+        alpha=args.alpha,
+        beta=args.beta,
+        gamma=args.gamma,
+        warranty_period=args.warranty_period,
+        censoring=args.censoring,
+        censor_time=args.censor_time,
+        observation_end=args.observation_end,
+        install_window=args.install_window,
+        n_failures=args.n_failures,
+        chunk_size=args.chunk_size,
+        seed=args.seed,
+        max_workers=args.workers,
+    )
+    if not args.histogram:
+        del result["histogram"], result["bins"]
+    else:
+        result["histogram"] = result["histogram"].tolist()
+        result["bins"] = result["bins"].tolist()
+    return result
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Weibull reliability tools.")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("metrics", help="failure rate, MTBF and reliability")
+    p.add_argument("--units", type=int, required=True)
+    p.add_argument("--operational-time", type=float, required=True)
+    p.add_argument("--failing-times", required=True, help="comma separated hours")
+    p.add_argument("--warranty-period", type=float, required=True)
+    p.add_argument("--slope", type=float, default=2, help="Weibull slope for the rate estimate")
+    p.set_defaults(handler=metrics)
+
+    p = commands.add_parser("fit", help="Weibull 2P/3P maximum likelihood fit")
+    p.add_argument("failures", nargs="?", help="comma separated failure times")
+    p.add_argument("--censored", help="comma separated right censored times, e.g. 1000x14")
+    p.add_argument("--three-p", action="store_true", help="fit the location parameter too")
+    p.add_argument("--file", help="stream a .csv, .parquet or .npy failure log instead")
+    p.add_argument("--time-col", default="time")
+    p.add_argument("--event-col", default="event")
+    p.add_argument(
+        "--censored-flag", action="store_true", help="--event-col marks censored rows"
+    )
+    p.add_argument("--plot", metavar="PATH", help="save the probability plot, or - to show it")
+    p.set_defaults(handler=fit)
+
+    p = commands.add_parser("compare", help="rank lifelines models by AIC")
+    p.add_argument("--file", help="CSV file (default: the Waltons data set)")
+    p.add_argument("--duration-col", default="T")
+    p.add_argument("--event-col", default="E")
+    p.add_argument("--models", nargs="+")
+    p.add_argument("--workers", type=int)
+    p.set_defaults(handler=compare)
+
+    p = commands.add_parser("simulate", help="Monte Carlo fleet simulation")
+    p.add_argument("--units", type=int, required=True)
+    p.add_argument("--alpha", type=float, required=True)
+    p.add_argument("--beta", type=float, required=True)
+    p.add_argument("--gamma", type=float, default=0.0)
+    p.add_argument("--warranty-period", type=float, default=float("inf"))
+    p.add_argument("--censoring", choices=["time", "staggered", "type2"])
+    p.add_argument("--censor-time", type=float)
+    p.add_argument("--observation-end", type=float)
+    p.add_argument("--install-window", type=float)
+    p.add_argument("--n-failures", type=int)
+    p.add_argument("--chunk-size", type=int, default=1_000_000)
+    p.add_argument("--seed", type=int)
+    p.add_argument("--workers", type=int, default=1)
+    p.add_argument("--histogram", action="store_true", help="include the failure-age histogram")
+    p.set_defaults(handler=simulate)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    result = args.handler(args)
+    if result is not None:
+        _print(result, args.json)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+# Fisher-matrix confidence bounds for fitted Weibull distributions, evaluated
+# over whole grids of times or probabilities at once.
+#
+# The bounds use the same delta-method construction as reliability's
+# Distributions (see reliability.Utils.distribution_confidence_intervals):
+#
+#   bounds on reliability:  u = beta * (ln(t) - ln(alpha)), R = exp(-exp(u))
+#   bounds on time:         v = ln(alpha) + ln(-ln(R)) / beta, t = exp(v)
+#
+# with Var(u) and Var(v) from the (alpha, beta) covariance of the fit, and
+# the Gaussian bound u +/- Z * sd(u). The covariance is taken once from each
+# fit (weibullfit's SE fields), so evaluating a grid is a few array
+# operations. Results are laid out as CI levels x fits x grid points.
+
+import numpy as np
+from scipy.special import ndtri
+
+
+def z_value(CI):
+    """
+    Two-sided standard normal quantile for confidence level(s) CI.
+    """
+    return -ndtri((1 - np.asarray(CI, dtype=np.float64)) / 2)
+
+
+class WeibullBounds:
+    """
+    Confidence bounds for one or more fitted Weibull 2P/3P distributions.
+
+    Parameters:
+    alpha, beta (array_like): Fitted scale and shape parameters.
+    alpha_SE, beta_SE (array_like): Their standard errors.
+    Cov_alpha_beta (array_like): Covariance of alpha and beta.
+    gamma (array_like): Location parameters (0 for a 2P fit).
+
+    All parameters are broadcast to a common 1-D shape, one entry per fit.
+    """
+
+    def __init__(self, alpha, beta, alpha_SE, beta_SE, Cov_alpha_beta, gamma=0.0):
+        arrays = np.broadcast_arrays(
+            *(
+                np.atleast_1d(np.asarray(p, dtype=np.float64))
+                for p in (alpha, beta, alpha_SE, beta_SE, Cov_alpha_beta, gamma)
+            )
+        )
+        self.alpha, self.beta, self.alpha_SE, self.beta_SE, self.cov, self.gamma = (
+            a.ravel() for a in arrays
+        )
+        self.log_alpha = np.log(self.alpha)
+
+    @classmethod
+    def from_fits(cls, fits):
+        """
+        Builds bounds from a WeibullFit, a list of WeibullFit or a DataFrame
+        with alpha, beta, alpha_SE, beta_SE and Cov_alpha_beta columns (such as
+        the output of groupfit.fit_weibull_groups).
+        """
+        if hasattr(fits, "_fields"):
+            fits = [fits]
+        if isinstance(fits, (list, tuple)):
+            columns = {
+                name: [getattr(f, name) for f in fits]
+                for name in ("alpha", "beta", "alpha_SE", "beta_SE", "Cov_alpha_beta", "gamma")
+            }
+        else:
+            columns = {
+                name: fits[name].to_numpy()
+                for name in ("alpha", "beta", "alpha_SE", "beta_SE", "Cov_alpha_beta")
+            }
+            columns["gamma"] = fits["gamma"].to_numpy() if "gamma" in fits else 0.0
+        return cls(**columns)
+
+    def _axes(self, CI, grid):
+        # CI levels x fits x grid points.
+        z = z_value(CI)
+        grid = np.asarray(grid, dtype=np.float64)
+        z_ax = z.reshape(z.shape + (1,) * (1 + grid.ndim))
+        p_ax = (slice(None),) + (None,) * grid.ndim
+        return z, z_ax, p_ax, grid
+
+    def _squeeze(self, arrays, z, grid):
+        shape = z.shape + self.alpha.shape + grid.shape
+        return tuple(np.broadcast_to(a, shape) for a in arrays)
+
+    def reliability(self, t, CI=0.95, func="SF"):
+        """
+        Bounds on SF, CDF or CHF at times t ("bounds on reliability").
+
+        Parameters:
+        t (array_like): Grid of times.
+        CI (float or array_like): Confidence level(s), two-sided.
+        func (str): "SF", "CDF" or "CHF".
+
+        Returns:
+        tuple: (lower, point, upper) arrays of shape CI.shape + (n_fits,) +
+        t.shape.
+        """
+        z, z_ax, p_ax, t = self._axes(CI, t)
+        a, b = self.alpha[p_ax], self.beta[p_ax]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log_shifted = np.log(np.maximum(t - self.gamma[p_ax], 0.0))
+            u = b * (log_shifted - self.log_alpha[p_ax])
+            du_da = -b / a
+            du_db = log_shifted - self.log_alpha[p_ax]
+            var_u = (
+                du_da**2 * self.alpha_SE[p_ax] ** 2
+                + du_db**2 * self.beta_SE[p_ax] ** 2
+                + 2 * du_da * du_db * self.cov[p_ax]
+            )
+        sd = np.sqrt(var_u)
+        u_lo, u_hi = u - z_ax * sd, u + z_ax * sd
+        chf = np.exp(u), np.exp(u_lo), np.exp(u_hi)
+        if func == "CHF":
+            point, lower, upper = chf
+        elif func == "SF":
+            point, lower, upper = np.exp(-chf[0]), np.exp(-chf[2]), np.exp(-chf[1])
+        elif func == "CDF":
+            point, lower, upper = -np.expm1(-chf[0]), -np.expm1(-chf[1]), -np.expm1(-chf[2])
+        else:
+            raise ValueError("func must be either CDF, SF, or CHF")
+        return self._squeeze((lower, point, upper), z, t)
+
+    def time(self, q, CI=0.95, func="CDF"):
+        """
+        Bounds on the time at which the CDF (or SF) reaches q ("bounds on
+        time"). With func="CDF" this gives quantile bounds, e.g. q=0.1 for
+        the B10 life.
+
+        Parameters:
+        q (array_like): Grid of probabilities in (0, 1).
+        CI (float or array_like): Confidence level(s), two-sided.
+        func (str): "CDF" if q are CDF values, "SF" if they are reliabilities.
+
+        Returns:
+        tuple: (lower, point, upper) times of shape CI.shape + (n_fits,) +
+        q.shape.
+        """
+        if func not in ("CDF", "SF"):
+            raise ValueError("func must be either CDF or SF")
+        z, z_ax, p_ax, q = self._axes(CI, q)
+        log_h = np.log(-np.log1p(-q)) if func == "CDF" else np.log(-np.log(q))
+        b = self.beta[p_ax]
+        v = self.log_alpha[p_ax] + log_h / b
+        dv_da = 1 / self.alpha[p_ax]
+        dv_db = -log_h / b**2
+        var_v = (
+            dv_da**2 * self.alpha_SE[p_ax] ** 2
+            + dv_db**2 * self.beta_SE[p_ax] ** 2
+            + 2 * dv_da * dv_db * self.cov[p_ax]
+        )
+        sd = np.sqrt(var_v)
+        g = self.gamma[p_ax]
+        point = np.exp(v) + g
+        lower = np.exp(v - z_ax * sd) + g
+        upper = np.exp(v + z_ax * sd) + g
+        return self._squeeze((lower, point, upper), z, q)
+
+    def quantile(self, q, CI=0.95):
+        """
+        Bounds on the q quantile (time by which a fraction q has failed).
+        """
+        return self.time(q, CI, func="CDF")
@@ -1,40 +1,50 @@
 import math
+import os
+import sys
 
-import matplotlib.pyplot as plt
 import numpy as np
-from reliability.Fitters import Fit_Weibull_2P
-from reliability.Probability_plotting import plot_points
+
+from lifedata import LifeData
+from weibullfit import fit_weibull_2p
 
 
 # Function to calculate the Mean Time Between Failures (MTBF) or theta
-def calculate_mtbf(total_operational_time, number_of_failures):
+def calculate_mtbf(total_operational_time, number_of_failures=None):
     """
     Calculates the Mean Time Between Failures (MTBF).
 
     Parameters:
-    total_operational_time (float): Total operational time in hours.
+    total_operational_time (float or LifeData): Total operational time in
+    hours, or a LifeData to take it and the number of failures from.
     number_of_failures (int): Number of failures that occurred.
 
     Returns:
     float: MTBF value in hours. Returns inf if no failures occurred.
     """
+    if isinstance(total_operational_time, LifeData):
+        data = total_operational_time
+        total_operational_time, number_of_failures = data.total_time(), data.n_failures
     if number_of_failures == 0:
         return float("inf")  # Infinite MTBF if no failures occurred
     return total_operational_time / number_of_failures
 
 
 # Function to calculate the failure rate or lamda
-def calculate_failure_rate(total_operational_time, number_of_failures):
+def calculate_failure_rate(total_operational_time, number_of_failures=None):
     """
     Calculates the failure rate (λ).
 
     Parameters:
-    total_operational_time (float): Total operational time in hours.
+    total_operational_time (float or LifeData): Total operational time in
+    hours, or a LifeData to take it and the number of failures from.
     number_of_failures (int): Number of failures that occurred.
 
     Returns:
     float: Failure rate. Returns 0.0 if no failures occurred.
     """
+    if isinstance(total_operational_time, LifeData):
+        data = total_operational_time
+        total_operational_time, number_of_failures = data.total_time(), data.n_failures
     if number_of_failures == 0:
         return 0.0  # No failures means zero failure rate
     return number_of_failures / total_operational_time
@@ -69,6 +79,152 @@ def calculate_weibull_reliability(lamda, time, slope):
     return math.exp(-time * lamda) ** slope
 
 
+# Batch forms of the metric functions above. Each accepts scalars or NumPy
+# arrays, broadcasts them against each other and returns a float64 array.
+# Results match the scalar functions to within floating-point rounding (NumPy's
+# exp/power may differ from math.exp by one ulp).
+def calculate_mtbf_batch(total_operational_time, number_of_failures):
+    """
+    Calculates the Mean Time Between Failures (MTBF) for many assets at once.
+
+    Parameters:
+    total_operational_time (array_like): Total operational time in hours.
+    number_of_failures (array_like): Number of failures that occurred.
+
+    Returns:
+    ndarray: MTBF values in hours. Entries with no failures are inf.
+    """
+    total_operational_time = np.asarray(total_operational_time, dtype=np.float64)
+    number_of_failures = np.asarray(number_of_failures, dtype=np.float64)
+    shape = np.broadcast_shapes(total_operational_time.shape, number_of_failures.shape)
+    out = np.full(shape, np.inf)
+    np.divide(
+        total_operational_time,
+        number_of_failures,
+        out=out,
+        where=number_of_failures != 0,
+    )
+    return out
+
+
+def calculate_failure_rate_batch(total_operational_time, number_of_failures):
+    """
+    Calculates the failure rate (λ) for many assets at once.
+
+    Parameters:
+    total_operational_time (array_like): Total operational time in hours.
+    number_of_failures (array_like): Number of failures that occurred.
+
+    Returns:
+    ndarray: Failure rates. Entries with no failures are 0.0.
+    """
+    total_operational_time = np.asarray(total_operational_time, dtype=np.float64)
+    number_of_failures = np.asarray(number_of_failures, dtype=np.float64)
+    shape = np.broadcast_shapes(total_operational_time.shape, number_of_failures.shape)
+    out = np.zeros(shape)
+    np.divide(
+        number_of_failures,
+        total_operational_time,
+        out=out,
+        where=number_of_failures != 0,
+    )
+    return out
+
+
+def calculate_exp_reliability_batch(lamda, time):
+    """
+    Calculates Exponential reliability over arrays of failure rates and times.
+
+    Parameters:
+    lamda (array_like): Failure rate (λ).
+    time (array_like): Time periods over which reliability is calculated.
+
+    Returns:
+    ndarray: Reliability values, broadcast over lamda and time.
+    """
+    lamda = np.asarray(lamda, dtype=np.float64)
+    time = np.asarray(time, dtype=np.float64)
+    return np.exp(-time * lamda)
+
+
+def calculate_weibull_reliability_batch(lamda, time, slope):
+    """
+    Calculates Weibull reliability over arrays of failure rates, times and
+    slopes.
+
+    Parameters:
+    lamda (array_like): Failure rate (λ).
+    time (array_like): Time periods over which reliability is calculated.
+    slope (array_like): Slope parameter of the Weibull distribution.
+
+    Returns:
+    ndarray: Reliability values, broadcast over lamda, time and slope.
+    """
+    slope = np.asarray(slope, dtype=np.float64)
+    return calculate_exp_reliability_batch(lamda, time) ** slope
+
+
+def pyplot():
+    """
+    Imports matplotlib.pyplot, switching to the non-interactive Agg backend
+    first when there is no display to show figures on.
+
+    Returns:
+    module: matplotlib.pyplot
+    """
+    import matplotlib
+
+    headless = sys.platform.startswith("linux") and not (
+        os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY")
+    )
+    if headless and "MPLBACKEND" not in os.environ:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    return plt
+
+
+def plot_fit(failing_times, fit):
+    """
+    Draws the Weibull probability plot and the fitted survival function side
+    by side on the current pyplot figure.
+
+    Parameters:
+    failing_times (array_like): Failure times in hours.
+    fit (WeibullFit): The fitted distribution from fit_weibull_2p or
+    fit_weibull_3p.
+
+    Returns:
+    module: matplotlib.pyplot, for show() or savefig().
+    """
+    # reliability pulls in scipy.stats and pyplot, which dominate import time,
+    # so it is only imported when something is actually plotted.
+    plt = pyplot()
+    from reliability.Distributions import Weibull_Distribution
+    from reliability.Probability_plotting import Weibull_probability_plot, plot_points
+
+    plt.subplot(121)
+    Weibull_probability_plot(failures=failing_times, __fitted_dist_params=fit)
+    plt.xlabel("Time (hours)")
+    plt.ylabel("Probability of Failure")
+    plt.title("Weibull Probability Plot")
+
+    plt.subplot(122)
+    Weibull_Distribution(alpha=fit.alpha, beta=fit.beta, gamma=fit.gamma).SF(
+        label="fitted distribution"
+    )  # builds the fitted distribution object and plots the survival function
+
+    plot_points(
+        failures=failing_times, func="SF"
+    )  # overlays the original data on the survival function
+    plt.xlabel("Time (hours)")
+    plt.ylabel("Survival Function (SF)")
+
+    plt.legend()
+    plt.grid(True)  # enables the grid on the plot
+    return plt
+
+
 def main():
     """
     The main function calculates and prints reliability metrics for a system
@@ -151,26 +307,10 @@ def main():
     )
     print(f"Weibull-distributed Reliability Rate: {wb_rel_rate:.6f}\n")
 
-    plt.subplot(121)
-    fit = Fit_Weibull_2P(failures=failing_times)
-    plt.xlabel("Time (hours)")
-    plt.ylabel("Probability of Failure")
-    plt.title("Weibull Probability Plot")
+    fit = fit_weibull_2p(failing_times)
+    print(f"Weibull Fit: alpha = {fit.alpha:.2f} hours, beta = {fit.beta:.4f}\n")
 
-    plt.subplot(122)
-    fit.distribution.SF(
-        label="fitted distribution"
-    )  # uses the distribution object from Fit_Weibull_2P and plots the survival function
-
-    plot_points(
-        failures=failing_times, func="SF"
-    )  # overlays the original data on the survival function
-    plt.xlabel("Time (hours)")
-    plt.ylabel("Survival Function (SF)")
-
-    plt.legend()
-    plt.grid(True)  # enables the grid on the plot
-    plt.show()
+    plot_fit(failing_times, fit).show()
 
     return failure_rate, mtbf, exp_rel_rate, wb_rel_rate
 
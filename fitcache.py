@@ -0,0 +1,217 @@
+# Content-addressed cache for analysis results.
+#
+# Entries are keyed by a SHA-256 fingerprint of the canonicalized inputs, so
+# resubmitting the same failure times in any order hits the same entry. The
+# in-memory store is an LRU with a per-entry TTL and a bound on both entry
+# count and (pickled) size. With a directory configured, entries are also
+# written to disk and reloaded on a memory miss, so they survive restarts.
+# The directory is held to the same entry count, size and TTL limits after
+# every write, evicting by file modification time (refreshed on each disk
+# hit, so least recently used first).
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+
+def fingerprint(failing_times, units, operational_time, warranty_period):
+    """
+    Builds the cache key for one analysis request.
+
+    Parameters:
+    failing_times (iterable): Failure times in hours, in any order.
+    units (int): Number of units in the system.
+    operational_time (float): Operational time in hours.
+    warranty_period (float): Warranty period in hours.
+
+    Returns:
+    str: Hex SHA-256 digest of the canonical JSON form of the inputs.
+    """
+    return digest(
+        {
+            "failing_times": sorted(float(t) for t in failing_times),
+            "units": int(units),
+            "operational_time": float(operational_time),
+            "warranty_period": float(warranty_period),
+        }
+    )
+
+
+def digest(canonical):
+    """
+    Hashes a JSON-serializable value into a cache key.
+
+    Parameters:
+    canonical (dict): Inputs already put in canonical form (sorted lists,
+    consistent numeric types).
+
+    Returns:
+    str: Hex SHA-256 digest of the compact, key-sorted JSON encoding.
+    """
+    blob = json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class FitCache:
+    """
+    Thread-safe LRU + TTL cache with optional on-disk persistence.
+
+    Parameters:
+    max_entries (int): Maximum number of entries held in memory, and on disk.
+    max_bytes (int): Maximum total pickled size of the entries held in memory,
+    and on disk.
+    ttl (float or None): Seconds an entry stays valid. None never expires.
+    path (str or None): Directory for persisted entries. None keeps the cache
+    in memory only.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, ttl=3600.0, path=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+
+    def _expired(self, expires_at):
+        return expires_at is not None and expires_at <= time.time()
+
+    def _file(self, key):
+        return os.path.join(self.path, key + ".pkl")
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _store(self, key, expires_at, value, size):
+        if key in self._entries:
+            self._remove(key)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (expires_at, size, value)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _load(self, key):
+        try:
+            with open(self._file(key), "rb") as f:
+                blob = f.read()
+        except FileNotFoundError:
+            return None
+        expires_at, value = pickle.loads(blob)
+        if self._expired(expires_at):
+            os.remove(self._file(key))
+            return None
+        os.utime(self._file(key))
+        self._store(key, expires_at, value, len(blob))
+        return value
+
+    def _prune_disk(self):
+        # Drops expired files, then the least recently used ones until the
+        # directory is within max_entries and max_bytes. Another process
+        # sharing the directory may remove a file first.
+        now = time.time()
+        files = []
+        for entry in os.scandir(self.path):
+            if not entry.name.endswith(".pkl"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if self.ttl is not None and stat.st_mtime + self.ttl <= now:
+                self._unlink(entry.path)
+            else:
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        count = len(files)
+        for _, size, path in files:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            self._unlink(path)
+            count -= 1
+            total -= size
+
+    def _unlink(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self.disk_evictions += 1
+
+    def get(self, key):
+        """
+        Returns the cached value for key, or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[0]):
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            value = self._load(key) if self.path is not None else None
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """
+        Stores value under key, evicting least recently used entries (in
+        memory and on disk) as needed.
+        """
+        expires_at = None if self.ttl is None else time.time() + self.ttl
+        blob = pickle.dumps((expires_at, value), protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._store(key, expires_at, value, len(blob))
+        if self.path is not None:
+            # Write then rename so a concurrent reader never sees a partial file.
+            fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(blob)
+            os.replace(tmp, self._file(key))
+            self._prune_disk()
+
+    def clear(self):
+        """
+        Drops every in-memory entry. Persisted entries are left on disk.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """
+        Returns the hit/miss/eviction counters and current size as a dict.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "disk_evictions": self.disk_evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
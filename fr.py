@@ -1,83 +1,297 @@
-import base64
-import io
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+import uuid
 
-import matplotlib.pyplot as plt
 import numpy as np
-from flask import Flask, render_template, request
-from reliability.Fitters import Fit_Weibull_2P
-from reliability.Probability_plotting import plot_points
+from flask import (
+    Flask,
+    Response,
+    abort,
+    g,
+    has_request_context,
+    jsonify,
+    render_template,
+    request,
+)
+
+import stagetimer
+from api import api
+from fitcache import FitCache, digest, fingerprint
+from stagetimer import SamplingProfiler, stage
+from workerpool import PoolBusy, WorkerPool
 
 
 app = Flask(__name__)
+app.register_blueprint(api)
+
+# Results keyed by the fingerprint of the form inputs. Set WEIBULL_CACHE_DIR to
+# keep them across restarts.
+cache = FitCache(
+    max_entries=int(os.environ.get("WEIBULL_CACHE_ENTRIES", 1024)),
+    ttl=float(os.environ.get("WEIBULL_CACHE_TTL", 3600)),
+    path=os.environ.get("WEIBULL_CACHE_DIR"),
+)
+
+# Fitting and rendering run in a bounded process pool shared by all request
+# threads. WEIBULL_WORKERS=0 runs them inline in the request thread instead.
+_workers = int(os.environ.get("WEIBULL_WORKERS", os.cpu_count() or 1))
+pool = (
+    WorkerPool(
+        max_workers=_workers,
+        max_pending=int(os.environ.get("WEIBULL_MAX_PENDING", 4 * _workers)),
+    )
+    if _workers > 0
+    else None
+)
+
+# One JSON line per request with the time spent in each stage.
+request_log = logging.getLogger("weibull.requests")
+
+# With WEIBULL_PROFILING=1 a request sent with an "X-Profile: 1" header is run
+# under the sampling profiler. The folded stacks are written to
+# WEIBULL_PROFILE_DIR and served at /profile/<id>, the id being returned in
+# the X-Profile-Id response header. Without it the header is ignored. With
+# the worker pool, the request thread only waits for the worker while a graph
+# is rendered, so the worker profiles the render itself and its stacks are
+# added under a "worker" frame.
+PROFILING = os.environ.get("WEIBULL_PROFILING") == "1"
+PROFILE_DIR = os.environ.get(
+    "WEIBULL_PROFILE_DIR", os.path.join(tempfile.gettempdir(), "weibull-profiles")
+)
+
+
+def generate_graphs(failing_times, fmt="png"):
+    """
+    Renders the Weibull probability plot and survival function.
+
+    Parameters:
+    failing_times (list): Failure times in hours.
+    fmt (str): "png", "svg" or "json".
+
+    Returns:
+    bytes: The encoded graph.
+    """
+    from render import render, render_timed
+
+    if pool is None:
+        return render(failing_times, fmt)
+    profiler = g.get("profiler") if has_request_context() else None
+    body, durations, samples = pool.run(render_timed, failing_times, fmt, profiler is not None)
+    # Stages and samples measured in the worker process are recorded here.
+    for name, seconds in durations.items():
+        stagetimer.observe(name, seconds)
+    if samples:
+        profiler.merge(samples, "worker")
+    return body
 
 
-def generate_graphs(failing_times):
-    plt.subplot(121)
-    fit = Fit_Weibull_2P(failures=failing_times)
-    plt.xlabel("Time (hours)")
-    plt.ylabel("Probability of Failure")
-    plt.title("Weibull Probability Plot")
+def analyze(units, operational_time, failing_times, warranty_period):
+    """
+    Calculates the reliability metrics shown on the results page.
 
-    plt.subplot(122)
-    fit.distribution.SF(label="Fitted Distribution")
-    plot_points(failures=failing_times, func="SF")
-    plt.xlabel("Time (hours)")
-    plt.ylabel("Survival Function (SF)")
-    plt.legend()
-    plt.grid(True)
+    Parameters:
+    units (int): Number of units in the system.
+    operational_time (int): Operational time in hours.
+    failing_times (list): Failure times in hours.
+    warranty_period (int): Warranty period in hours.
 
-    # Save the plot to a buffer
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png")
-    buf.seek(0)
-    graph_data = base64.b64encode(buf.read()).decode("utf-8")
-    buf.close()
-    plt.close()
-    return graph_data
+    Returns:
+    dict: Template variables for results.html, except failing_times and
+    graph_data.
+    """
+    failing_units = len(failing_times)
+    passing_units = units - failing_units
+    total_op_time = passing_units * operational_time + sum(failing_times)
+    scale_param = 2  # Example value for Weibull distribution
+
+    failure_rate = failing_units / total_op_time if failing_units > 0 else 0.0
+    mtbf = total_op_time / failing_units if failing_units > 0 else float("inf")
+    exp_rel_rate = round(np.exp(-warranty_period * failure_rate) * 100, 2)
+    wb_rel_rate = round(np.exp(-warranty_period * failure_rate) ** scale_param * 100, 2)
+
+    return dict(
+        units=units,
+        operational_time=operational_time,
+        warranty_period=warranty_period,
+        failing_units=failing_units,
+        passing_units=passing_units,
+        total_op_time=total_op_time,
+        failure_rate=failure_rate,
+        mtbf=mtbf,
+        exp_rel_rate=exp_rel_rate,
+        wb_rel_rate=wb_rel_rate,
+    )
+
+
+@app.before_request
+def start_timers():
+    g.start = time.perf_counter()
+    g.stage_token = stagetimer.begin()
+    g.profiler = None
+    if PROFILING and request.headers.get("X-Profile") == "1":
+        g.profiler = SamplingProfiler().start()
+
+
+@app.after_request
+def finish_timers(response):
+    total = time.perf_counter() - g.start
+    stagetimer.observe("request", total)
+    durations = stagetimer.end(g.pop("stage_token"))
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        profile_id = uuid.uuid4().hex
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        with open(os.path.join(PROFILE_DIR, profile_id + ".folded"), "w") as f:
+            f.write(profiler.stop())
+        response.headers["X-Profile-Id"] = profile_id
+    request_log.info(
+        json.dumps(
+            {
+                "method": request.method,
+                "path": request.path,
+                "endpoint": request.endpoint,
+                "status": response.status_code,
+                "duration_ms": round(total * 1e3, 3),
+                "stages_ms": {k: round(v * 1e3, 3) for k, v in durations.items()},
+            }
+        )
+    )
+    return response
+
+
+@app.teardown_request
+def stop_timers(error):
+    # after_request is skipped when a request raises, so whatever it did not
+    # pop is stopped here: the profiler thread would otherwise keep sampling.
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        profiler.stop()
+    token = g.pop("stage_token", None)
+    if token is not None:
+        stagetimer.end(token)
 
 
 @app.route("/", methods=["GET", "POST"])
 def index():
     if request.method == "POST":
         # Get inputs from the form
-        units = int(request.form["units"])
-        operational_time = int(request.form["operational_time"])
-        failing_times = list(map(int, request.form["failing_times"].split(",")))
-        warranty_period = int(request.form["warranty_period"])
-
-        # Calculate metrics
-        failing_units = len(failing_times)
-        passing_units = units - failing_units
-        total_op_time = passing_units * operational_time + sum(failing_times)
-        scale_param = 2  # Example value for Weibull distribution
-
-        failure_rate = failing_units / total_op_time if failing_units > 0 else 0.0
-        mtbf = total_op_time / failing_units if failing_units > 0 else float("inf")
-        exp_rel_rate = round(np.exp(-warranty_period * failure_rate) * 100, 2)
-        wb_rel_rate = round(np.exp(-warranty_period * failure_rate) ** scale_param * 100, 2)
-
-        # Generate graphs
-        graph_data = generate_graphs(failing_times)
-
-        # Render results
-        return render_template(
-            "results.html",
-            units=units,
-            operational_time=operational_time,
-            failing_times=failing_times,
-            warranty_period=warranty_period,
-            failing_units=failing_units,
-            passing_units=passing_units,
-            total_op_time=total_op_time,
-            failure_rate=failure_rate,
-            mtbf=mtbf,
-            exp_rel_rate=exp_rel_rate,
-            wb_rel_rate=wb_rel_rate,
-            graph_data=graph_data,
-        )
+        with stage("parse"):
+            units = int(request.form["units"])
+            operational_time = int(request.form["operational_time"])
+            failing_times = list(map(int, request.form["failing_times"].split(",")))
+            warranty_period = int(request.form["warranty_period"])
+
+        key = fingerprint(failing_times, units, operational_time, warranty_period)
+        with stage("cache"):
+            results = cache.get(key)
+        if results is None:
+            # Calculate metrics. The graphs are served separately by graph().
+            with stage("analyze"):
+                results = analyze(units, operational_time, failing_times, warranty_period)
+            cache.set(key, results)
+
+        # Render results. failing_times is passed separately so the page shows
+        # the order that was submitted, not the order that was cached.
+        return render_template("results.html", failing_times=failing_times, **results)
 
     return render_template("index.html")
 
 
+@app.route("/graph.<fmt>")
+def graph(fmt):
+    # Served from its own URL so browsers and proxies can cache the image
+    # instead of it being inlined into every results page. render (and with it
+    # matplotlib) is only imported once a graph is actually requested.
+    from render import MEDIA_TYPES
+
+    if fmt not in MEDIA_TYPES:
+        abort(404)
+    with stage("parse"):
+        try:
+            failing_times = list(map(int, request.args["failing_times"].split(",")))
+        except ValueError:
+            abort(400, description="failing_times must be comma separated integers.")
+    if min(failing_times) <= 0 or len(set(failing_times)) < 2:
+        abort(400, description="At least two distinct positive failing_times are required.")
+
+    key = digest({"failing_times": sorted(failing_times), "format": fmt})
+    with stage("cache"):
+        body = cache.get(key)
+    if body is None:
+        # Includes the wait for a worker; the worker's own stages (fit,
+        # series, draw, encode) are recorded separately.
+        with stage("render"):
+            try:
+                body = generate_graphs(failing_times, fmt)
+            except ValueError as exc:
+                # The Weibull fit did not converge.
+                abort(400, description=str(exc))
+        cache.set(key, body)
+
+    response = Response(body, mimetype=MEDIA_TYPES[fmt])
+    response.set_etag(key)
+    response.cache_control.public = True
+    response.cache_control.max_age = 86400
+    return response.make_conditional(request)
+
+
+@app.errorhandler(PoolBusy)
+def pool_busy(error):
+    return Response("Server busy, retry shortly.\n", status=503, headers={"Retry-After": "1"})
+
+
+@app.route("/metrics")
+def metrics():
+    return Response(stagetimer.timers.metrics_text(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/profile/<profile_id>")
+def profile(profile_id):
+    # Folded stacks, e.g. for flamegraph.pl or https://www.speedscope.app
+    if not re.fullmatch(r"[0-9a-f]{32}", profile_id):
+        abort(404)
+    path = os.path.join(PROFILE_DIR, profile_id + ".folded")
+    if not os.path.exists(path):
+        abort(404)
+    with open(path) as f:
+        return Response(f.read(), mimetype="text/plain")
+
+
+@app.route("/cache/stats")
+def cache_stats():
+    return jsonify(cache.stats())
+
+
+@app.route("/compare", methods=["POST"])
+def compare():
+    # Expects JSON {"durations": [...], "events": [...], "models": [...]}. The
+    # fits run on the shared worker pool, or inline with WEIBULL_WORKERS=0.
+    from modelcompare import compare_models
+
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or "durations" not in payload or "events" not in payload:
+        return jsonify(error='expected a JSON object with "durations" and "events" lists'), 400
+    try:
+        table = compare_models(
+            payload["durations"],
+            payload["events"],
+            models=payload.get("models"),
+            pool=pool,
+            max_workers=0,
+        )
+    except (TypeError, ValueError) as exc:
+        return jsonify(error=str(exc)), 400
+    table = table.reset_index().astype(object)
+    return jsonify(table.where(table.notna(), None).to_dict(orient="records"))
+
+
 if __name__ == "__main__":
-    app.run(debug=True)
+    # Development server. Every handler is reentrant, so in production run
+    # under a multi-worker WSGI server instead, e.g.
+    #   gunicorn --workers 4 --threads 8 fr:app
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    app.run(debug=os.environ.get("FLASK_DEBUG", "1") == "1", threaded=True)
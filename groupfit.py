@@ -0,0 +1,99 @@
+# Fits one Weibull 2P model per group (part number, failure mode, ...) from a
+# long-format table of (group_id, time, censored_flag) rows.
+#
+# Rows are not split into per-group arrays. Every row keeps its group code and
+# all groups are solved together by weibullfit's lockstep Newton iteration, so
+# the cost is a handful of passes over the rows no matter how many groups
+# there are.
+
+import numpy as np
+import pandas as pd
+
+from lifedata import LifeData
+from weibullfit import _profile_mle
+
+
+def fit_weibull_groups(
+    data,
+    group_col="group_id",
+    time_col="time",
+    censored_col="censored",
+    tol=1e-10,
+    max_iter=100,
+):
+    """
+    Fits a two parameter Weibull distribution to every group in a long table.
+
+    Parameters:
+    data (DataFrame): One row per unit with a group id, a time and a flag
+    that is true when the time is right censored rather than a failure.
+    group_col (str): Name of the group id column.
+    time_col (str): Name of the time column.
+    censored_col (str): Name of the right censored flag column.
+    tol (float): Relative convergence tolerance on beta.
+    max_iter (int): Maximum number of Newton iterations.
+
+    Returns:
+    DataFrame: One row per group, indexed by group id, with alpha, beta,
+    alpha_SE, beta_SE, Cov_alpha_beta, loglik, n, n_failures, n_iter and
+    converged. Groups without failures, or that did not converge (e.g. a
+    single distinct failure time), have nan parameters and converged set to
+    False.
+    """
+    codes, groups = pd.factorize(data[group_col], sort=True)
+    times = data[time_col].to_numpy(dtype=np.float64)
+    events = 1.0 - data[censored_col].to_numpy(dtype=np.float64)
+    return fit_weibull_codes(codes, times, events, len(groups), tol, max_iter).set_index(
+        pd.Index(groups, name=group_col)
+    )
+
+
+def fit_weibull_codes(codes, times, events=None, n_groups=None, tol=1e-10, max_iter=100, weights=None):
+    """
+    Fits a two parameter Weibull distribution to every group given integer
+    group codes.
+
+    Parameters:
+    codes (array_like): Group code of each observation, in [0, n_groups).
+    times (array_like or LifeData): Failure or right censored time of each
+    observation, or a LifeData with failures and right censored rows (which
+    supplies events and weights).
+    events (array_like): 1 for failures, 0 for right censored observations.
+    n_groups (int or None): Number of groups. Defaults to max(codes) + 1.
+    tol (float): Relative convergence tolerance on beta.
+    max_iter (int): Maximum number of Newton iterations.
+    weights (array_like or None): Number of units each observation stands
+    for. n and n_failures count units.
+
+    Returns:
+    DataFrame: One row per group code with the same columns as
+    fit_weibull_groups.
+    """
+    codes = np.asarray(codes, dtype=np.intp)
+    if isinstance(times, LifeData):
+        times, events, weights = times.right_censored_arrays()
+    times = np.asarray(times, dtype=np.float64)
+    events = np.asarray(events, dtype=np.float64)
+    if np.any(times <= 0):
+        raise ValueError("All failure and right censored times must be positive.")
+    weights = np.ones(times.size) if weights is None else np.asarray(weights, dtype=np.float64)
+    if weights.shape != times.shape:
+        raise ValueError("weights must have the same length as times")
+    if n_groups is None:
+        n_groups = int(codes.max()) + 1 if codes.size else 0
+
+    res = _profile_mle(np.log(times), events, weights, codes, n_groups, tol=tol, max_iter=max_iter)
+    return pd.DataFrame(
+        {
+            "alpha": res["alpha"],
+            "beta": res["beta"],
+            "alpha_SE": res["alpha_SE"],
+            "beta_SE": res["beta_SE"],
+            "Cov_alpha_beta": res["Cov_alpha_beta"],
+            "loglik": res["loglik"],
+            "n": np.bincount(codes, weights, minlength=n_groups).astype(np.int64),
+            "n_failures": res["n_failures"].astype(np.int64),
+            "n_iter": res["n_iter"],
+            "converged": res["converged"],
+        }
+    )
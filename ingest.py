@@ -0,0 +1,299 @@
+# Streaming ingestion of failure logs that are too large to load at once.
+#
+# A log is read as a sequence of (times, events) chunks from CSV (pandas
+# chunked reader), Parquet (pyarrow record batches) or a structured .npy
+# array (memory-mapped). Nothing but the current chunk is held in memory.
+#
+# Failure rate and MTBF only need counts and total time, which FailureLogStats
+# accumulates in one pass. The Weibull likelihood has no fixed-size sufficient
+# statistics, so weibull_loglik evaluates given (alpha, beta) pairs in one
+# pass and fit_weibull_stream solves the MLE with one pass per Newton
+# iteration. Both give the same result as loading the whole file, up to the
+# order of floating-point summation.
+
+import os
+
+import numpy as np
+
+from failurerate import calculate_failure_rate, calculate_mtbf
+from lifedata import LifeData
+from weibullfit import WeibullFit, _covariance, _menon_start, _newton_step
+
+
+def iter_chunks(
+    path,
+    time_col="time",
+    event_col="event",
+    event_is_censored=False,
+    chunksize=1_000_000,
+):
+    """
+    Yields a failure log in chunks.
+
+    Parameters:
+    path (str): A .csv, .parquet or structured .npy file.
+    time_col (str): Name of the time column.
+    event_col (str or None): Name of the event column. None treats every
+    row as a failure.
+    event_is_censored (bool): True if event_col flags right censored rows
+    instead of failures.
+    chunksize (int): Rows per chunk.
+
+    Yields:
+    tuple: (times, events) float64 arrays, events being 1.0 for failures and
+    0.0 for right censored rows.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    columns = [time_col] if event_col is None else [time_col, event_col]
+
+    if ext == ".csv":
+        import pandas as pd
+
+        reader = pd.read_csv(path, usecols=columns, chunksize=chunksize)
+        batches = ({c: chunk[c].to_numpy() for c in columns} for chunk in reader)
+    elif ext in (".parquet", ".pq"):
+        import pyarrow.parquet as pq
+
+        batches = (
+            {c: batch.column(c).to_numpy(zero_copy_only=False) for c in columns}
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns)
+        )
+    elif ext == ".npy":
+        table = np.load(path, mmap_mode="r")
+        batches = (
+            {c: table[c][start : start + chunksize] for c in columns}
+            for start in range(0, table.shape[0], chunksize)
+        )
+    else:
+        raise ValueError(f"Unsupported failure log format: {ext}")
+
+    for batch in batches:
+        times = np.asarray(batch[time_col], dtype=np.float64)
+        if event_col is None:
+            events = np.ones(times.size)
+        else:
+            events = np.asarray(batch[event_col], dtype=np.float64)
+            if event_is_censored:
+                events = 1.0 - events
+        yield times, events
+
+
+def _check(times, events):
+    if not np.all(np.isfinite(times)) or not np.all(np.isfinite(events)):
+        raise ValueError("All times and events must be finite.")
+    if np.any(times <= 0):
+        raise ValueError("All failure and right censored times must be positive.")
+
+
+class FailureLogStats:
+    """
+    Running counts and sums over a failure log.
+
+    Attributes:
+    n (int): Number of units.
+    n_failures (int): Number of failures.
+    total_time (float): Sum of all times (total operational time).
+    sum_log_failures (float): Sum of log failure times.
+    sum_sq_log_failures (float): Sum of squared log failure times.
+    min_time, max_time (float): Smallest and largest time seen.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.n_failures = 0
+        self.total_time = 0.0
+        self.sum_log_failures = 0.0
+        self.sum_sq_log_failures = 0.0
+        self.min_time = np.inf
+        self.max_time = -np.inf
+
+    def update(self, times, events=None, weights=None):
+        """
+        Adds one chunk of (times, events), optionally with the number of
+        units each row stands for, or a LifeData with failures and right
+        censored rows.
+        """
+        if isinstance(times, LifeData):
+            times, events, weights = times.right_censored_arrays()
+        if times.size == 0:
+            return self
+        _check(times, events)
+        failed = events == 1
+        log_fail = np.log(times[failed])
+        if weights is None:
+            n, n_failures = times.size, log_fail.size
+            total_time, sum_log = times.sum(), log_fail.sum()
+            sum_sq_log = (log_fail * log_fail).sum()
+        else:
+            fail_weights = weights[failed]
+            n, n_failures = weights.sum(), fail_weights.sum()
+            total_time, sum_log = np.dot(weights, times), np.dot(fail_weights, log_fail)
+            sum_sq_log = np.dot(fail_weights, log_fail * log_fail)
+        self.n += int(n)
+        self.n_failures += int(n_failures)
+        self.total_time += float(total_time)
+        self.sum_log_failures += float(sum_log)
+        self.sum_sq_log_failures += float(sum_sq_log)
+        self.min_time = min(self.min_time, float(times.min()))
+        self.max_time = max(self.max_time, float(times.max()))
+        return self
+
+    def merge(self, other):
+        """
+        Combines the stats of another part of the same log (e.g. a shard read
+        by another process) into this one.
+        """
+        self.n += other.n
+        self.n_failures += other.n_failures
+        self.total_time += other.total_time
+        self.sum_log_failures += other.sum_log_failures
+        self.sum_sq_log_failures += other.sum_sq_log_failures
+        self.min_time = min(self.min_time, other.min_time)
+        self.max_time = max(self.max_time, other.max_time)
+        return self
+
+    @property
+    def failure_rate(self):
+        return calculate_failure_rate(self.total_time, self.n_failures)
+
+    @property
+    def mtbf(self):
+        return calculate_mtbf(self.total_time, self.n_failures)
+
+
+def summarize(path, **kwargs):
+    """
+    Computes FailureLogStats for a failure log in one streaming pass.
+
+    Parameters:
+    path (str): Failure log, see iter_chunks.
+    **kwargs: Passed to iter_chunks.
+
+    Returns:
+    FailureLogStats: The accumulated stats.
+    """
+    stats = FailureLogStats()
+    for times, events in iter_chunks(path, **kwargs):
+        stats.update(times, events)
+    return stats
+
+
+def weibull_loglik(path, alpha, beta, stats=None, **kwargs):
+    """
+    Evaluates the Weibull 2P log-likelihood of a failure log for one or more
+    parameter pairs in one streaming pass.
+
+    Parameters:
+    path (str): Failure log, see iter_chunks.
+    alpha (array_like): Scale parameter(s).
+    beta (array_like): Shape parameter(s), broadcast against alpha.
+    stats (FailureLogStats or None): Stats from summarize(), if already
+    computed, to avoid recounting the failures.
+    **kwargs: Passed to iter_chunks.
+
+    Returns:
+    ndarray: Log-likelihood for each (alpha, beta) pair.
+    """
+    alpha, beta = np.broadcast_arrays(
+        np.asarray(alpha, dtype=np.float64), np.asarray(beta, dtype=np.float64)
+    )
+    shape = alpha.shape
+    log_alpha = np.log(alpha.ravel())
+    beta = beta.ravel()
+
+    count = stats is None
+    if count:
+        stats = FailureLogStats()
+    sum_z = np.zeros(beta.size)
+    for times, events in iter_chunks(path, **kwargs):
+        if count:
+            stats.update(times, events)
+        else:
+            _check(times, events)
+        u = np.log(times)[:, None] - log_alpha[None, :]
+        sum_z += np.exp(beta[None, :] * u).sum(axis=0)
+
+    r = stats.n_failures
+    loglik = (
+        r * np.log(beta)
+        - r * beta * log_alpha
+        + (beta - 1.0) * stats.sum_log_failures
+        - sum_z
+    )
+    return loglik.reshape(shape)
+
+
+def fit_weibull_stream(path, tol=1e-10, max_iter=100, stats=None, **kwargs):
+    """
+    Fits a Weibull 2P distribution to a failure log by maximum likelihood,
+    streaming the file once per Newton iteration.
+
+    Parameters:
+    path (str): Failure log, see iter_chunks.
+    tol (float): Relative convergence tolerance on beta.
+    max_iter (int): Maximum number of Newton iterations.
+    stats (FailureLogStats or None): Stats from summarize(), if already
+    computed. Otherwise an extra pass computes them.
+    **kwargs: Passed to iter_chunks.
+
+    Returns:
+    WeibullFit: Same fields as weibullfit.fit_weibull_2p. As there, the
+    parameters are nan if the fit did not converge within max_iter.
+    """
+    if stats is None:
+        stats = summarize(path, **kwargs)
+    r = stats.n_failures
+    if r < 1:
+        raise ValueError("At least one failure is required to fit a Weibull distribution.")
+
+    # Log times are shifted by the largest one so exp(beta * x) cannot overflow.
+    c = np.log(stats.max_time)
+    mean_fail_x = stats.sum_log_failures / r - c
+    beta = _menon_start(stats.sum_sq_log_failures / r - (stats.sum_log_failures / r) ** 2)
+    lo, hi = np.zeros(()), np.full((), np.inf)
+    active = np.ones((), dtype=bool)
+    n_iter = 0
+    done = False
+
+    def power_sums(b, shift, k):
+        sums = np.zeros(k)
+        for times, events in iter_chunks(path, **kwargs):
+            # stats may have been computed from other data, so every pass
+            # checks what it reads.
+            _check(times, events)
+            x = np.log(times) - shift
+            e = np.exp(b * x)
+            for j in range(k):
+                sums[j] += e.sum()
+                e = e * x
+        return sums
+
+    for n_iter in range(1, max_iter + 1):
+        s0, s1, s2 = power_sums(beta, c, 3)
+        step, lo, hi = _newton_step(beta, lo, hi, active, s0, s1, s2, mean_fail_x)
+        done = abs(step - beta) <= tol * beta
+        beta = step
+        if done:
+            break
+    converged = bool(done)
+    if not converged:
+        nan = float("nan")
+        return WeibullFit(nan, nan, 0.0, nan, nan, nan, nan, n_iter=n_iter, converged=False)
+
+    s0 = power_sums(beta, c, 1)[0]
+    log_alpha = c + np.log(s0 / r) / beta
+    sz, szu, szu2 = power_sums(beta, log_alpha, 3)
+    alpha = np.exp(log_alpha)
+    loglik = r * np.log(beta) - r * beta * log_alpha + (beta - 1.0) * stats.sum_log_failures - sz
+    var_alpha, var_beta, cov_ab = _covariance(r, alpha, beta, sz, szu, szu2)
+    return WeibullFit(
+        alpha=float(alpha),
+        beta=float(beta),
+        gamma=0.0,
+        alpha_SE=float(np.sqrt(abs(var_alpha))),
+        beta_SE=float(np.sqrt(abs(var_beta))),
+        Cov_alpha_beta=float(cov_ab),
+        loglik=float(loglik),
+        n_iter=n_iter,
+        converged=converged,
+    )
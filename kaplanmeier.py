@@ -0,0 +1,300 @@
+# Kaplan-Meier (product-limit) and Nelson-Aalen estimators on NumPy arrays,
+# for data sets far larger than lifelines' pandas event tables handle well.
+#
+# Both estimators depend on the data only through the event table: the
+# distinct times with the number of failures and of censorings at each. That
+# table is built with np.unique (or, for already sorted input, by finding
+# where the time changes), can be given directly as pre-aggregated counts, and
+# merges exactly across shards by adding counts at equal times. So a file
+# that does not fit in memory is reduced chunk by chunk (event_table_stream)
+# and only the table, one row per distinct time, is ever held.
+#
+# The estimates follow lifelines (KaplanMeierFitter and NelsonAalenFitter
+# with its default tie smoothing), including the row at time 0, Greenwood's
+# variance and the exponential Greenwood (log(-log)) bounds for the
+# Kaplan-Meier curve and the log-transformed bounds for the cumulative hazard.
+
+from collections import namedtuple
+
+import numpy as np
+from scipy.special import digamma, ndtri, polygamma
+
+from lifedata import LifeData
+
+EventTable = namedtuple("EventTable", ["time", "observed", "censored"])
+
+KaplanMeier = namedtuple(
+    "KaplanMeier",
+    ["time", "at_risk", "observed", "censored", "survival", "greenwood", "lower", "upper"],
+)
+
+NelsonAalen = namedtuple(
+    "NelsonAalen",
+    ["time", "at_risk", "observed", "censored", "cumulative_hazard", "variance", "lower", "upper"],
+)
+
+
+def event_table(durations, event_observed=None, weights=None, assume_sorted=False):
+    """
+    Aggregates individual observations into an event table.
+
+    Parameters:
+    durations (array_like): Failure or censoring time of each unit.
+    event_observed (array_like or None): 1/True for failures, 0/False for
+    right censored units. None means every unit failed.
+    weights (array_like or None): Number of units each row stands for.
+    assume_sorted (bool): Skip the sort when durations are already in
+    ascending order.
+
+    Returns:
+    EventTable: Distinct times in ascending order with the failure and
+    censoring counts (float64, so that weights may be fractional).
+    """
+    durations = np.asarray(durations, dtype=np.float64).ravel()
+    n = durations.size
+    events = (
+        np.ones(n) if event_observed is None else np.asarray(event_observed, dtype=np.float64).ravel()
+    )
+    if events.size != n or (weights is not None and np.size(weights) != n):
+        raise ValueError("durations, event_observed and weights must have the same length")
+    if np.isnan(durations).any():
+        raise ValueError("durations contains NaNs")
+
+    if weights is None and not assume_sorted:
+        # Unweighted: counting the failure and censoring times separately
+        # needs only plain sorts, about three times faster than an argsort
+        # and with no inverse index.
+        failed = events != 0
+        fail_time, fail_count = np.unique(durations[failed], return_counts=True)
+        cens_time, cens_count = np.unique(durations[~failed], return_counts=True)
+        return aggregate(
+            np.r_[fail_time, cens_time],
+            np.r_[fail_count, np.zeros(cens_count.size)],
+            np.r_[np.zeros(fail_count.size), cens_count],
+        )
+
+    weights = np.ones(n) if weights is None else np.asarray(weights, dtype=np.float64).ravel()
+    if assume_sorted:
+        starts = np.flatnonzero(np.r_[True, durations[1:] != durations[:-1]])
+        time = durations[starts]
+        removed = np.add.reduceat(weights, starts) if n else np.zeros(0)
+        observed = np.add.reduceat(weights * events, starts) if n else np.zeros(0)
+    else:
+        time, inverse = np.unique(durations, return_inverse=True)
+        removed = np.bincount(inverse, weights=weights, minlength=time.size)
+        observed = np.bincount(inverse, weights=weights * events, minlength=time.size)
+    return EventTable(time, observed, removed - observed)
+
+
+def aggregate(time, n_events, n_censored):
+    """
+    Builds an event table from pre-aggregated counts. Times may be unsorted
+    and repeated; counts at equal times are added.
+    """
+    time = np.asarray(time, dtype=np.float64).ravel()
+    unique, inverse = np.unique(time, return_inverse=True)
+    observed = np.bincount(inverse, weights=np.asarray(n_events, dtype=np.float64).ravel())
+    censored = np.bincount(inverse, weights=np.asarray(n_censored, dtype=np.float64).ravel())
+    return EventTable(unique, observed, censored)
+
+
+def merge(*tables):
+    """
+    Merges event tables computed on separate shards of one data set.
+    """
+    return aggregate(
+        np.concatenate([t.time for t in tables]),
+        np.concatenate([t.observed for t in tables]),
+        np.concatenate([t.censored for t in tables]),
+    )
+
+
+def event_table_stream(path, **kwargs):
+    """
+    Builds the event table of a failure log chunk by chunk.
+
+    Parameters:
+    path (str): Failure log, see ingest.iter_chunks.
+    **kwargs: Passed to ingest.iter_chunks.
+
+    Returns:
+    EventTable
+    """
+    from ingest import iter_chunks
+
+    table = EventTable(np.zeros(0), np.zeros(0), np.zeros(0))
+    for times, events in iter_chunks(path, **kwargs):
+        table = merge(table, event_table(times, events))
+    return table
+
+
+def _risk_sets(table):
+    # Adds lifelines' row at time 0 and the number at risk at each time.
+    time, observed, censored = table
+    if time.size == 0 or time[0] > 0:
+        time = np.r_[0.0, time]
+        observed = np.r_[0.0, observed]
+        censored = np.r_[0.0, censored]
+    removed = observed + censored
+    total = removed.sum()
+    at_risk = total - np.r_[0.0, np.cumsum(removed)[:-1]]
+    return time, at_risk, observed, censored
+
+
+def _as_table(data, event_observed, weights):
+    if isinstance(data, EventTable):
+        return data
+    if isinstance(data, LifeData):
+        durations, events, _ = data.right_censored_arrays()
+        return event_table(durations, events, data.weight)
+    return event_table(data, event_observed, weights)
+
+
+def kaplan_meier(data, event_observed=None, weights=None, alpha=0.05):
+    """
+    Kaplan-Meier estimate of the survival function.
+
+    Parameters:
+    data (EventTable, LifeData or array_like): An event table, a LifeData,
+    or the durations.
+    event_observed, weights: See event_table, when data are durations.
+    alpha (float): The bounds are at the 1 - alpha confidence level.
+
+    Returns:
+    KaplanMeier: Per distinct time (starting at 0): the number at risk,
+    failures, censorings, the survival estimate, Greenwood's sum (the
+    variance of log survival) and the lower and upper bounds.
+    """
+    time, at_risk, observed, censored = _risk_sets(_as_table(data, event_observed, weights))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_survival = np.cumsum(np.log(at_risk - observed) - np.log(at_risk))
+        step = observed / (at_risk * (at_risk - observed))
+        greenwood = np.cumsum(np.where(np.isinf(step), 0.0, step))
+        survival = np.exp(log_survival)
+
+        # Exponential Greenwood bounds on log(-log(S)).
+        z = ndtri(1 - alpha / 2)
+        half = z * np.sqrt(greenwood) / log_survival
+        lower = np.exp(-np.exp(np.log(-log_survival) - half))
+        upper = np.exp(-np.exp(np.log(-log_survival) + half))
+    lower = np.where(np.isnan(lower), 1.0, lower)
+    upper = np.where(np.isnan(upper), 1.0, upper)
+    return KaplanMeier(time, at_risk, observed, censored, survival, greenwood, lower, upper)
+
+
+def nelson_aalen(data, event_observed=None, weights=None, alpha=0.05, smoothing=True):
+    """
+    Nelson-Aalen estimate of the cumulative hazard.
+
+    Parameters:
+    data (EventTable, LifeData or array_like): An event table, a LifeData,
+    or the durations.
+    event_observed, weights: See event_table, when data are durations.
+    alpha (float): The bounds are at the 1 - alpha confidence level.
+    smoothing (bool): Treat d tied failures among n at risk as happening one
+    after another, adding 1/n + 1/(n-1) + ... + 1/(n-d+1) rather than d/n,
+    as lifelines does by default.
+
+    Returns:
+    NelsonAalen: Per distinct time (starting at 0): the number at risk,
+    failures, censorings, the cumulative hazard, its variance and the lower
+    and upper bounds.
+    """
+    time, at_risk, observed, censored = _risk_sets(_as_table(data, event_observed, weights))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if smoothing:
+            # The sums over the tied failures in closed form; a single failure
+            # (the common case) is just 1/n and 1/n**2.
+            single = observed <= 1
+            rest = at_risk - observed + 1
+            increment = np.where(
+                single, observed / at_risk, digamma(at_risk + 1) - digamma(rest)
+            )
+            var_increment = np.where(
+                single, observed / at_risk**2, polygamma(1, rest) - polygamma(1, at_risk + 1)
+            )
+        else:
+            increment = observed / at_risk
+            var_increment = (1 - increment) * increment / at_risk
+    increment = np.where(at_risk > 0, increment, 0.0)
+    var_increment = np.where(at_risk > 0, var_increment, 0.0)
+    cumulative_hazard = np.cumsum(increment)
+    variance = np.cumsum(var_increment)
+
+    z = ndtri(1 - alpha / 2)
+    half = z * np.sqrt(variance) / np.where(cumulative_hazard == 0, 1.0, cumulative_hazard)
+    lower = cumulative_hazard * np.exp(-half)
+    upper = cumulative_hazard * np.exp(half)
+    return NelsonAalen(time, at_risk, observed, censored, cumulative_hazard, variance, lower, upper)
+
+
+def predict(estimate, t):
+    """
+    Evaluates a step-function estimate (the survival of a KaplanMeier or the
+    cumulative hazard of a NelsonAalen) at times t.
+    """
+    if isinstance(estimate, KaplanMeier):
+        values = estimate.survival
+    else:
+        values = estimate.cumulative_hazard
+    index = np.searchsorted(estimate.time, np.asarray(t, dtype=np.float64), side="right") - 1
+    return values[np.maximum(index, 0)]
+
+
+def median_survival_time(km):
+    """
+    First time at which the Kaplan-Meier survival is at or below 0.5, inf if
+    it never is (lifelines' median_survival_time_).
+    """
+    below = np.flatnonzero(km.survival <= 0.5)
+    return km.time[below[0]] if below.size else np.inf
+
+
+def to_frame(estimate):
+    """
+    Returns an estimate as a DataFrame indexed by time.
+    """
+    import pandas as pd
+
+    frame = pd.DataFrame(estimate._asdict()).set_index("time")
+    frame.index.name = "timeline"
+    return frame
+
+
+def main():
+    """
+    Compares the estimates with lifelines on the Waltons data used in
+    lifelynes.py and on a few million simulated units.
+    """
+    import time as timer
+
+    from lifelines import KaplanMeierFitter, NelsonAalenFitter
+    from lifelines.datasets import load_waltons
+
+    df = load_waltons()
+    T, E = df["T"].to_numpy(), df["E"].to_numpy()
+    km = kaplan_meier(T, E)
+    na = nelson_aalen(T, E)
+    kmf = KaplanMeierFitter().fit(T, E)
+    naf = NelsonAalenFitter().fit(T, E)
+    print("Waltons, largest differences from lifelines:")
+    print(f"  KM survival: {np.abs(km.survival - kmf.survival_function_.iloc[:, 0]).max():.2e}")
+    print(f"  KM bounds: {np.abs(km.lower - kmf.confidence_interval_.iloc[:, 0]).max():.2e}")
+    print(f"  NA hazard: {np.abs(na.cumulative_hazard - naf.cumulative_hazard_.iloc[:, 0]).max():.2e}")
+    print(f"  Median: {median_survival_time(km)} vs {kmf.median_survival_time_}")
+
+    rng = np.random.default_rng(0)
+    n = 5_000_000
+    durations = np.round(1000 * rng.weibull(2.0, n), 1)
+    events = durations < 1500
+    start = timer.perf_counter()
+    kaplan_meier(np.minimum(durations, 1500), events)
+    ours = timer.perf_counter() - start
+    start = timer.perf_counter()
+    KaplanMeierFitter().fit(np.minimum(durations, 1500), events)
+    theirs = timer.perf_counter() - start
+    print(f"\n{n} units: {ours:.2f} s here, {theirs:.2f} s with lifelines")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+# Columnar container for life data, accepted by the fitters in weibullfit.py,
+# bootstrap.py, bestfit.py and kaplanmeier.py, by
+# groupfit.fit_weibull_codes, ModelStore.fit_or_load,
+# ingest.FailureLogStats.update, api.analyze_batch and failurerate's MTBF and
+# failure rate. Modules whose inputs carry more than times and flags (stresses
+# in altfit.py, failure modes in hazards.py, batches in onlinefit.py) keep
+# their own arguments.
+#
+# A LifeData holds
+#
+#   time    contiguous float64, the failure or censoring time (the lower end
+#           for interval censored rows)
+#   flag    uint8, one of RIGHT, FAILURE, LEFT, INTERVAL
+#   weight  optional int64, the number of identical units a row stands for
+#   upper   optional float64, the upper end for interval censored rows
+#
+# The flag codes are chosen so that a lifelines-style event column (1 for a
+# failure, 0 for right censored) already is a valid flag array: a bool or
+# uint8 column is viewed as flags without a copy. Columns that already have
+# the right dtype and are contiguous are likewise used as they are, whether
+# they come from NumPy, pandas (to_numpy() of a float64 column) or Arrow
+# (to_numpy() of a single-chunk column without nulls), so building a LifeData
+# from a large table copies nothing. Arrow stores booleans as bits, so a
+# boolean Arrow column is the one case that must be converted.
+
+import numpy as np
+
+RIGHT = 0
+FAILURE = 1
+LEFT = 2
+INTERVAL = 3
+
+_FLAG_NAMES = {
+    RIGHT: "right_censored",
+    FAILURE: "failures",
+    LEFT: "left_censored",
+    INTERVAL: "interval_censored",
+}
+
+
+def _column(values, dtype):
+    # No copy when values is already a contiguous array of dtype.
+    return np.ascontiguousarray(values, dtype=dtype).ravel()
+
+
+def _flags(values):
+    values = np.asarray(values)
+    if values.dtype == np.bool_:
+        values = values.view(np.uint8)
+    # Checked before the cast to uint8, which would wrap e.g. 256 or -255 to
+    # a valid flag.
+    if values.dtype == np.uint8:
+        valid = not values.size or values.max() <= INTERVAL
+    else:
+        valid = np.isin(values, (RIGHT, FAILURE, LEFT, INTERVAL)).all()
+    if not valid:
+        raise ValueError("flags must be RIGHT (0), FAILURE (1), LEFT (2) or INTERVAL (3)")
+    return _column(values, np.uint8)
+
+
+class LifeData:
+    """
+    Failure and censoring times with their censoring flags.
+
+    Parameters:
+    time (array_like): Failure or censoring times.
+    flag (array_like or None): Censoring flag of each row (see the module
+    comment), or an event indicator (1/True for failures). None means every
+    row is a failure.
+    weight (array_like or None): Integer count of units per row.
+    upper (array_like or None): Upper ends of interval censored rows (NaN or
+    ignored elsewhere).
+    """
+
+    __slots__ = ("time", "flag", "weight", "upper")
+
+    def __init__(self, time, flag=None, weight=None, upper=None):
+        self.time = _column(time, np.float64)
+        n = self.time.size
+        self.flag = np.full(n, FAILURE, dtype=np.uint8) if flag is None else _flags(flag)
+        self.weight = None
+        if weight is not None:
+            weight = np.asarray(weight)
+            if weight.dtype.kind == "f" and np.any(weight != np.round(weight)):
+                raise ValueError("weights must be whole numbers of units")
+            self.weight = _column(weight, np.int64)
+        self.upper = None if upper is None else _column(upper, np.float64)
+        for name in ("flag", "weight", "upper"):
+            column = getattr(self, name)
+            if column is not None and column.size != n:
+                raise ValueError(f"{name} must have the same length as time")
+        if self.upper is None and np.any(self.flag == INTERVAL):
+            raise ValueError("interval censored rows need upper")
+
+    @classmethod
+    def from_failures(cls, failures, right_censored=None, left_censored=None, weight=None):
+        """
+        Builds a LifeData from separate lists, as reliability's fitters take
+        them (failures=..., right_censored=...). This concatenates, so it
+        copies.
+        """
+        parts = [(failures, FAILURE), (right_censored, RIGHT), (left_censored, LEFT)]
+        parts = [(np.asarray(p, dtype=np.float64).ravel(), f) for p, f in parts if p is not None]
+        time = np.concatenate([p for p, _ in parts])
+        flag = np.concatenate([np.full(p.size, f, dtype=np.uint8) for p, f in parts])
+        return cls(time, flag, weight)
+
+    @classmethod
+    def from_reliability(cls, data):
+        """
+        Builds a LifeData from reliability's make_right_censored_data (or any
+        object with failures and right_censored attributes).
+        """
+        return cls.from_failures(data.failures, getattr(data, "right_censored", None))
+
+    @classmethod
+    def from_frame(cls, df, time_col="T", event_col="E", flag_col=None, weight_col=None):
+        """
+        Builds a LifeData from DataFrame columns without copying them when
+        their dtypes already match (float64 times, bool/uint8 events, int64
+        weights).
+
+        Parameters:
+        df (DataFrame): The data, e.g. lifelines' load_waltons().
+        time_col (str): Time column.
+        event_col (str or None): Event indicator column (1 = failure).
+        flag_col (str or None): Censoring flag column, used instead of
+        event_col for left or interval censored data.
+        weight_col (str or None): Integer weight column.
+        """
+        flag_name = flag_col or event_col
+        return cls(
+            df[time_col].to_numpy(),
+            None if flag_name is None else df[flag_name].to_numpy(),
+            None if weight_col is None else df[weight_col].to_numpy(),
+        )
+
+    @classmethod
+    def from_arrow(cls, table, time_col="time", event_col="event", flag_col=None, weight_col=None):
+        """
+        Builds a LifeData from a pyarrow Table or RecordBatch (e.g. from
+        pyarrow.parquet.read_table). Single-chunk columns without nulls are
+        used zero-copy; chunked columns are combined first.
+        """
+
+        def column(name):
+            col = table.column(name)
+            if hasattr(col, "num_chunks"):
+                col = col.chunk(0) if col.num_chunks == 1 else col.combine_chunks()
+            return col.to_numpy(zero_copy_only=False)
+
+        flag_name = flag_col or event_col
+        return cls(
+            column(time_col),
+            None if flag_name is None else column(flag_name),
+            None if weight_col is None else column(weight_col),
+        )
+
+    def __len__(self):
+        return self.time.size
+
+    def __repr__(self):
+        counts = ", ".join(f"{_FLAG_NAMES[f]}={c}" for f, c in self.counts().items() if c)
+        return f"LifeData(rows={len(self)}, {counts})"
+
+    def weights(self):
+        """Weights as float64 (ones when unweighted)."""
+        if self.weight is None:
+            return np.ones(self.time.size)
+        return self.weight.astype(np.float64)
+
+    def counts(self):
+        """Number of units per flag, as {flag: count}."""
+        totals = np.bincount(self.flag, weights=self.weight, minlength=INTERVAL + 1)
+        return {f: int(totals[f]) for f in (RIGHT, FAILURE, LEFT, INTERVAL)}
+
+    @property
+    def n_failures(self):
+        return self.counts()[FAILURE]
+
+    def total_time(self):
+        """Total operating time of all units (for failurerate's metrics)."""
+        if self.weight is None:
+            return float(self.time.sum())
+        return float(np.dot(self.time, self.weight))
+
+    @property
+    def failures(self):
+        return self.time[self.flag == FAILURE]
+
+    @property
+    def right_censored(self):
+        return self.time[self.flag == RIGHT]
+
+    def right_censored_arrays(self):
+        """
+        The data as (times, events, weights) arrays for the fitters that
+        handle failures and right censoring only.
+
+        Raises:
+        ValueError: If there are left or interval censored rows.
+        """
+        if np.any(self.flag > FAILURE):
+            raise ValueError("Only failures and right censored data are supported here.")
+        # flag is 1 for failures and 0 for right censored rows.
+        return self.time, self.flag.astype(np.float64), self.weights()
+
+    def to_frame(self):
+        """Returns the columns as a DataFrame."""
+        import pandas as pd
+
+        columns = {"time": self.time, "flag": self.flag}
+        if self.weight is not None:
+            columns["weight"] = self.weight
+        if self.upper is not None:
+            columns["upper"] = self.upper
+        return pd.DataFrame(columns, copy=False)
@@ -0,0 +1,119 @@
+# Load-test harness for the Flask app in fr.py.
+#
+# Start the server first (python fr.py, or gunicorn fr:app), then run e.g.
+#   python loadtest.py --url http://127.0.0.1:5000 --requests 200
+# Each concurrency level runs that many client threads, each issuing requests
+# back to back. Every request posts the form and then fetches the graph it
+# links to, with random failure times by default so the result cache does not
+# hide the cost of fitting and rendering (--repeat sends one fixed payload).
+
+import argparse
+import random
+import re
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+import numpy as np
+
+
+def _payload(rng, repeat):
+    if repeat:
+        failing_times = [550, 480, 680, 790, 860, 620]
+    else:
+        failing_times = [rng.randint(100, 1000) for _ in range(rng.randint(3, 15))]
+    return {
+        "units": 20,
+        "operational_time": 1000,
+        "failing_times": ",".join(map(str, failing_times)),
+        "warranty_period": 200,
+    }
+
+
+def _one_request(url, payload, graph_format):
+    body = urllib.parse.urlencode(payload).encode()
+    with urllib.request.urlopen(url + "/", data=body) as response:
+        html = response.read().decode("utf-8")
+    match = re.search(r'src="([^"]+)"', html)
+    if match:
+        graph = match.group(1).replace("&amp;", "&").replace(".svg?", f".{graph_format}?")
+        with urllib.request.urlopen(url + graph) as response:
+            response.read()
+
+
+def run_level(url, clients, n_requests, repeat=False, graph_format="svg", seed=0):
+    """
+    Runs one concurrency level.
+
+    Parameters:
+    url (str): Base URL of the server.
+    clients (int): Number of concurrent client threads.
+    n_requests (int): Total number of requests spread over the clients.
+    repeat (bool): Send the same payload every time instead of random ones.
+    graph_format (str): Graph format to fetch ("svg", "png" or "json").
+    seed (int): Seed for the random payloads.
+
+    Returns:
+    dict: clients, requests, errors, p50 and p99 latency in ms and
+    throughput in requests per second.
+    """
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    per_client = max(n_requests // clients, 1)
+
+    def client(index):
+        rng = random.Random(seed * 1000 + index)
+        for _ in range(per_client):
+            payload = _payload(rng, repeat)
+            start = time.perf_counter()
+            try:
+                _one_request(url, payload, graph_format)
+            except Exception:
+                with lock:
+                    errors[0] += 1
+                continue
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+
+    lat = np.array(latencies) * 1000
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "errors": errors[0],
+        "p50_ms": float(np.percentile(lat, 50)) if lat.size else float("nan"),
+        "p99_ms": float(np.percentile(lat, 99)) if lat.size else float("nan"),
+        "throughput_rps": len(latencies) / wall,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Weibull analysis app.")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="requests per level")
+    parser.add_argument("--format", default="svg", choices=["svg", "png", "json"])
+    parser.add_argument("--repeat", action="store_true", help="send one fixed payload")
+    args = parser.parse_args()
+
+    print(f"{'clients':>8} {'requests':>9} {'errors':>7} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>8}")
+    for clients in args.clients:
+        r = run_level(args.url, clients, args.requests, args.repeat, args.format)
+        print(
+            f"{r['clients']:>8} {r['requests']:>9} {r['errors']:>7} "
+            f"{r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['throughput_rps']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
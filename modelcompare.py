@@ -0,0 +1,235 @@
+# Fits the lifelines models used in lifelynes.py to the same (T, E) data in
+# parallel and ranks them by AIC.
+#
+# T and E are copied once into shared memory blocks. Each worker process
+# attaches to those blocks in its initializer (or, on a pool shared with other
+# work such as fr.py's WorkerPool, for the duration of each task), so only the
+# model name and a few bytes of metadata are pickled per task. The slow fitters
+# (GeneralizedGamma, Spline) are submitted first so they don't end up as the
+# tail of the run.
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+
+def _kaplan_meier(T, E):
+    from lifelines import KaplanMeierFitter
+
+    return KaplanMeierFitter()
+
+
+def _weibull(T, E):
+    from lifelines import WeibullFitter
+
+    return WeibullFitter()
+
+
+def _exponential(T, E):
+    from lifelines import ExponentialFitter
+
+    return ExponentialFitter()
+
+
+def _log_normal(T, E):
+    from lifelines import LogNormalFitter
+
+    return LogNormalFitter()
+
+
+def _log_logistic(T, E):
+    from lifelines import LogLogisticFitter
+
+    return LogLogisticFitter()
+
+
+def _piecewise_exponential(T, E):
+    from lifelines import PiecewiseExponentialFitter
+
+    # Breakpoints at the terciles of the observed event times.
+    return PiecewiseExponentialFitter(np.percentile(T[E.astype(bool)], [100 / 3, 200 / 3]))
+
+
+def _generalized_gamma(T, E):
+    from lifelines import GeneralizedGammaFitter
+
+    return GeneralizedGammaFitter()
+
+
+def _spline(T, E):
+    from lifelines import SplineFitter
+
+    return SplineFitter(np.percentile(T[E.astype(bool)], [0, 50, 100]))
+
+
+# Model name -> factory building an unfitted lifelines fitter for (T, E).
+# Listed slowest first, which is also the submission order.
+MODELS = {
+    "GeneralizedGammaFitter": _generalized_gamma,
+    "SplineFitter": _spline,
+    "PiecewiseExponentialFitter": _piecewise_exponential,
+    "LogLogisticFitter": _log_logistic,
+    "LogNormalFitter": _log_normal,
+    "WeibullFitter": _weibull,
+    "ExponentialFitter": _exponential,
+    "KaplanMeierFitter": _kaplan_meier,
+}
+
+# Set in each worker by _attach.
+_shared = {}
+
+
+def _attach(t_spec, e_spec):
+    for key, (name, shape, dtype) in (("T", t_spec), ("E", e_spec)):
+        shm = shared_memory.SharedMemory(name=name)
+        _shared[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        _shared[key + "_shm"] = shm  # keeps the mapping alive
+
+
+def _fit_one(model):
+    """
+    Fits a single model against the shared T/E arrays.
+
+    Parameters:
+    model (str): Key of MODELS.
+
+    Returns:
+    dict: model, log_likelihood, AIC, BIC, n_params, fit_time and error.
+    """
+    T = _shared["T"]
+    E = _shared["E"]
+    row = {
+        "model": model,
+        "log_likelihood": np.nan,
+        "AIC": np.nan,
+        "BIC": np.nan,
+        "n_params": 0,
+        "fit_time": np.nan,
+        "error": None,
+    }
+    start = time.perf_counter()
+    try:
+        fitter = MODELS[model](T, E).fit(T, E, label=model)
+    except Exception as exc:  # a failed fit should not sink the whole comparison
+        row["error"] = f"{type(exc).__name__}: {exc}"
+        row["fit_time"] = time.perf_counter() - start
+        return row
+    row["fit_time"] = time.perf_counter() - start
+
+    # Non-parametric fitters such as Kaplan-Meier have no likelihood.
+    if hasattr(fitter, "log_likelihood_"):
+        k = len(fitter._fitted_parameter_names)
+        ll = float(fitter.log_likelihood_)
+        row["log_likelihood"] = ll
+        row["n_params"] = k
+        row["AIC"] = 2 * k - 2 * ll
+        row["BIC"] = k * np.log(len(T)) - 2 * ll
+    return row
+
+
+def _fit_attached(model, t_spec, e_spec):
+    """
+    _fit_one on a pool whose workers were not started with _attach: attaches
+    to the shared blocks for this task only.
+    """
+    _attach(t_spec, e_spec)
+    try:
+        return _fit_one(model)
+    finally:
+        for key in ("T", "E"):
+            del _shared[key]
+            _shared.pop(key + "_shm").close()
+
+
+def _share(array):
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+
+def compare_models(T, E, models=None, max_workers=None, mp_context=None, pool=None):
+    """
+    Fits several lifelines models to the same data in a process pool.
+
+    Parameters:
+    T (array_like): Durations.
+    E (array_like): 1 if the event was observed, 0 if censored.
+    models (list or None): Names from MODELS to fit. Defaults to all of them.
+    max_workers (int or None): Size of the process pool. Defaults to the
+    number of models or CPUs, whichever is smaller. 0 fits the models one
+    after another in the calling process.
+    mp_context (multiprocessing context or None): Passed to
+    ProcessPoolExecutor, e.g. multiprocessing.get_context("spawn") when
+    called from a threaded server.
+    pool (object or None): An existing pool with a submit method, such as
+    workerpool.WorkerPool, to run the fits on instead of starting a new
+    one. max_workers and mp_context are then ignored.
+
+    Returns:
+    DataFrame: One row per model ranked by AIC (models without a likelihood
+    last), with log_likelihood, AIC, BIC, n_params, fit_time in seconds and
+    any error message.
+    """
+    T = np.ascontiguousarray(T, dtype=np.float64)
+    E = np.ascontiguousarray(E, dtype=np.float64)
+    if T.ndim != 1 or T.shape != E.shape:
+        raise ValueError("T and E must be one-dimensional and of the same length.")
+    if models is None:
+        models = list(MODELS)
+    unknown = set(models) - set(MODELS)
+    if unknown:
+        raise ValueError(f"Unknown models: {sorted(unknown)}")
+    models = [m for m in MODELS if m in models]
+    if max_workers is None:
+        max_workers = min(len(models), os.cpu_count() or 1)
+
+    t_shm, t_spec = _share(T)
+    e_shm, e_spec = _share(E)
+    try:
+        if pool is not None:
+            futures = [pool.submit(_fit_attached, m, t_spec, e_spec) for m in models]
+            rows = [f.result() for f in as_completed(futures)]
+        elif max_workers == 0:
+            rows = [_fit_attached(m, t_spec, e_spec) for m in models]
+        else:
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=mp_context,
+                initializer=_attach,
+                initargs=(t_spec, e_spec),
+            ) as executor:
+                futures = [executor.submit(_fit_one, m) for m in models]
+                rows = [f.result() for f in as_completed(futures)]
+    finally:
+        for shm in (t_shm, e_shm):
+            shm.close()
+            shm.unlink()
+
+    table = pd.DataFrame(rows).sort_values(["AIC", "model"], na_position="last")
+    table = table.reset_index(drop=True)
+    table.index = table.index + 1
+    table.index.name = "rank"
+    return table
+
+
+def main():
+    """
+    Compares all models on the Waltons data set used in lifelynes.py and
+    prints the ranking.
+    """
+    from lifelines.datasets import load_waltons
+
+    df = load_waltons()
+    start = time.perf_counter()
+    table = compare_models(df["T"], df["E"])
+    print(table.to_string())
+    print(f"\nTotal wall time: {time.perf_counter() - start:.2f} s")
+    print(f"Sum of fit times: {table['fit_time'].sum():.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,430 @@
+# SQLite registry of fitted life distributions.
+#
+# Each row is one fitted model for an asset (or part number) over a time
+# window: the distribution parameters, their standard errors and covariance,
+# the log-likelihood, the sample statistics (units, failures, total operating
+# time) and a fingerprint of the input data. Rows are indexed by
+# (asset, window_start, window_end) and by fingerprint, so
+#
+#   - a refit can be skipped when the same data was fitted before for the
+#     same asset, distribution and window (fit_or_load),
+#   - the model of an asset in force at a given time, or every model whose
+#     window overlaps a range, comes back from one indexed query, and
+#   - reliability at any times is evaluated from the stored parameters.
+#
+# Every distribution is stored in Weibull form, SF(t) = exp(-((t - gamma) /
+# alpha) ** beta); an Exponential with rate Lambda is alpha = 1 / Lambda,
+# beta = 1. Bulk inserts go through executemany in a single transaction.
+
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from weibullfit import _pack, fit_weibull_2p, fit_weibull_3p
+
+COLUMNS = (
+    "asset",
+    "window_start",
+    "window_end",
+    "distribution",
+    "alpha",
+    "beta",
+    "gamma",
+    "alpha_SE",
+    "beta_SE",
+    "Cov_alpha_beta",
+    "loglik",
+    "n",
+    "n_failures",
+    "total_time",
+    "fingerprint",
+    "created",
+)
+
+StoredModel = namedtuple("StoredModel", ("id",) + COLUMNS)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS models (
+    id INTEGER PRIMARY KEY,
+    asset TEXT NOT NULL,
+    window_start REAL NOT NULL,
+    window_end REAL NOT NULL,
+    distribution TEXT NOT NULL,
+    alpha REAL NOT NULL,
+    beta REAL NOT NULL,
+    gamma REAL NOT NULL DEFAULT 0,
+    alpha_SE REAL,
+    beta_SE REAL,
+    Cov_alpha_beta REAL,
+    loglik REAL,
+    n INTEGER,
+    n_failures INTEGER,
+    total_time REAL,
+    fingerprint TEXT,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS models_asset_window ON models (asset, window_start, window_end);
+CREATE INDEX IF NOT EXISTS models_fingerprint ON models (fingerprint);
+"""
+
+
+def data_fingerprint(failures, right_censored=None):
+    """
+    Fingerprints fit input independently of row order.
+
+    Parameters:
+    failures (array_like or LifeData): Failure times, or a LifeData.
+    right_censored (array_like or None): Right censored times.
+
+    Returns:
+    str: Hex SHA-256 digest of the sorted failure and censored times.
+    """
+    times, events = _pack(failures, right_censored)
+    h = hashlib.sha256()
+    h.update(np.sort(times[events == 1]).tobytes())
+    h.update(b"|")
+    h.update(np.sort(times[events == 0]).tobytes())
+    return h.hexdigest()
+
+
+def _sample_stats(failures, right_censored):
+    times, events = _pack(failures, right_censored)
+    return {"n": int(times.size), "n_failures": int(events.sum()), "total_time": float(times.sum())}
+
+
+class ModelStore:
+    """
+    SQLite-backed registry of fitted models.
+
+    Parameters:
+    path (str): Database file, or ":memory:". The file is created if needed
+    and opened in WAL mode so several processes can read while one writes.
+    """
+
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    @staticmethod
+    def _row(asset, fit, window, distribution=None, fingerprint=None, stats=None):
+        # A WeibullFit, a dict with the COLUMNS fields, or a dict with Lambda.
+        params = fit._asdict() if hasattr(fit, "_asdict") else dict(fit)
+        if "Lambda" in params:
+            params.update(alpha=1.0 / params["Lambda"], beta=1.0, gamma=0.0)
+            distribution = distribution or "Exponential"
+        if distribution is None:
+            distribution = "Weibull_3P" if params.get("gamma", 0.0) else "Weibull_2P"
+        params.update(stats or {})
+        params.update(
+            asset=str(asset),
+            window_start=float(window[0]),
+            window_end=float(window[1]),
+            distribution=distribution,
+            fingerprint=fingerprint,
+            created=time.time(),
+        )
+        params.setdefault("gamma", 0.0)
+        return tuple(_plain(params.get(name)) for name in COLUMNS)
+
+    def add(self, asset, fit, window=(-np.inf, np.inf), distribution=None, fingerprint=None, stats=None):
+        """
+        Stores one fitted model.
+
+        Parameters:
+        asset (str): Asset or part identifier.
+        fit (WeibullFit or dict): The fit. Dicts use the COLUMNS names, or
+        Lambda for an Exponential.
+        window (tuple): (start, end) of the period the data covers.
+        distribution (str or None): Name to store. Defaults to Weibull_2P,
+        Weibull_3P (nonzero gamma) or Exponential (Lambda given).
+        fingerprint (str or None): data_fingerprint of the input.
+        stats (dict or None): n, n_failures and total_time.
+
+        Returns:
+        int: The new row id.
+
+        Raises:
+        ValueError: If alpha or beta is not finite (a fit that did not
+        converge).
+        """
+        row = self._row(asset, fit, window, distribution, fingerprint, stats)
+        params = dict(zip(COLUMNS, row))
+        if not all(params[name] is not None and np.isfinite(params[name]) for name in ("alpha", "beta")):
+            raise ValueError("Only fits with finite alpha and beta can be stored.")
+        with self._lock:
+            cursor = self._db.execute(
+                f"INSERT INTO models ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                row,
+            )
+            return cursor.lastrowid
+
+    def add_many(self, records, asset_col="asset"):
+        """
+        Stores many models in one transaction. Records without finite alpha
+        and beta (groups without failures) are skipped.
+
+        Parameters:
+        records (iterable or DataFrame): Dicts (or DataFrame rows) with an
+        asset, the fit fields and optionally window_start, window_end,
+        distribution, fingerprint, n, n_failures and total_time. A DataFrame
+        without an asset column takes the asset from its index, so the
+        output of groupfit.fit_weibull_groups can be stored as it is.
+        asset_col (str): Name of the asset field.
+
+        Returns:
+        int: Number of rows inserted.
+        """
+        if hasattr(records, "to_dict"):
+            if asset_col not in records.columns:
+                records = records.rename_axis(asset_col).reset_index()
+            records = records.to_dict(orient="records")
+        rows = []
+        for r in records:
+            r = dict(r)
+            r["asset"] = r.pop(asset_col)
+            if not (np.isfinite(r.get("alpha", np.nan)) and np.isfinite(r.get("beta", np.nan))):
+                if "Lambda" not in r:
+                    continue
+            window = (r.pop("window_start", -np.inf), r.pop("window_end", np.inf))
+            stats = {k: r.pop(k) for k in ("n", "n_failures", "total_time") if k in r}
+            rows.append(
+                self._row(
+                    r.pop("asset"), r, window, r.pop("distribution", None), r.pop("fingerprint", None), stats
+                )
+            )
+        sql = f"INSERT INTO models ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany(sql, rows)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def _select(self, where, args, order="window_start, id", limit=None):
+        sql = f"SELECT id, {', '.join(COLUMNS)} FROM models"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {order}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            rows = self._db.execute(sql, args).fetchall()
+        return [StoredModel(*row) for row in rows]
+
+    def query(self, asset=None, start=None, end=None, distribution=None):
+        """
+        Returns the models whose window overlaps [start, end].
+
+        Parameters:
+        asset (str, list or None): One asset, a list of assets, or all.
+        start, end (float or None): Range of interest; None is unbounded.
+        distribution (str or None): Only models of this distribution.
+
+        Returns:
+        list: StoredModel rows ordered by asset and window start.
+        """
+        where, args = [], []
+        if isinstance(asset, (list, tuple)):
+            where.append(f"asset IN ({', '.join('?' * len(asset))})")
+            args.extend(map(str, asset))
+        elif asset is not None:
+            where.append("asset = ?")
+            args.append(str(asset))
+        if start is not None:
+            where.append("window_end >= ?")
+            args.append(float(start))
+        if end is not None:
+            where.append("window_start <= ?")
+            args.append(float(end))
+        if distribution is not None:
+            where.append("distribution = ?")
+            args.append(distribution)
+        return self._select(where, args, order="asset, window_start, id")
+
+    def latest(self, asset, at=None, distribution=None):
+        """
+        The most recently stored model of an asset whose window contains
+        time at (any window if at is None), or None.
+        """
+        where, args = ["asset = ?"], [str(asset)]
+        if at is not None:
+            where += ["window_start <= ?", "window_end >= ?"]
+            args += [float(at), float(at)]
+        if distribution is not None:
+            where.append("distribution = ?")
+            args.append(distribution)
+        rows = self._select(where, args, order="window_start DESC, id DESC", limit=1)
+        return rows[0] if rows else None
+
+    def find(self, fingerprint, distribution=None, asset=None, window=None):
+        """
+        The latest model fitted to data with this fingerprint, or None.
+
+        Parameters:
+        fingerprint (str): data_fingerprint of the input.
+        distribution (str or None): Only models of this distribution.
+        asset (str or None): Only models of this asset.
+        window (tuple or None): Only models with exactly this (start, end).
+        """
+        where, args = ["fingerprint = ?"], [fingerprint]
+        if distribution is not None:
+            where.append("distribution = ?")
+            args.append(distribution)
+        if asset is not None:
+            where.append("asset = ?")
+            args.append(str(asset))
+        if window is not None:
+            where += ["window_start = ?", "window_end = ?"]
+            args += [float(window[0]), float(window[1])]
+        rows = self._select(where, args, order="id DESC", limit=1)
+        return rows[0] if rows else None
+
+    def fit_or_load(
+        self, asset, failures, right_censored=None, window=(-np.inf, np.inf), fitter=None, distribution=None
+    ):
+        """
+        Returns the stored model of this asset, distribution and window for
+        this exact data if there is one, and otherwise fits it
+        (weibullfit.fit_weibull_2p by default) and stores the result.
+
+        Parameters:
+        asset (str): Asset or part identifier.
+        failures (array_like or LifeData): Failure times, or a LifeData.
+        right_censored (array_like or None): Right censored times.
+        window (tuple): (start, end) of the period the data covers.
+        fitter (callable or None): fitter(failures, right_censored) returning
+        a WeibullFit.
+        distribution (str or None): Name the fit is stored and looked up
+        under. Defaults to Weibull_2P or Weibull_3P for the fitters in
+        weibullfit, and to the fitter's name otherwise.
+
+        Returns:
+        StoredModel
+
+        Raises:
+        ValueError: If the fit did not converge (see add()).
+        """
+        if fitter is None:
+            fitter = fit_weibull_2p
+        if distribution is None:
+            # Named after the fitter, not the result: a 3P fit whose gamma
+            # comes out 0 must still not be served for a 2P request.
+            distribution = {
+                fit_weibull_2p: "Weibull_2P",
+                fit_weibull_3p: "Weibull_3P",
+            }.get(fitter, getattr(fitter, "__name__", None))
+        key = data_fingerprint(failures, right_censored)
+        found = self.find(key, distribution, asset, window)
+        if found is not None:
+            return found
+        fit = fitter(failures, right_censored)
+        row_id = self.add(
+            asset, fit, window, distribution, fingerprint=key, stats=_sample_stats(failures, right_censored)
+        )
+        return self._select(["id = ?"], [row_id])[0]
+
+    def stats(self):
+        with self._lock:
+            n_models, n_assets = self._db.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT asset) FROM models"
+            ).fetchone()
+        return {"models": n_models, "assets": n_assets, "path": self.path}
+
+
+def _plain(value):
+    # sqlite3 does not take NumPy scalars.
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def reliability_at(models, t):
+    """
+    Reliability of stored models at times t.
+
+    Parameters:
+    models (StoredModel or list): Rows from ModelStore.
+    t (array_like): Times.
+
+    Returns:
+    ndarray: SF values of shape (n_models,) + t.shape, or t.shape for a
+    single model.
+    """
+    single = isinstance(models, StoredModel)
+    rows = [models] if single else list(models)
+    t = np.asarray(t, dtype=np.float64)
+    col = (slice(None),) + (None,) * t.ndim
+    alpha = np.array([m.alpha for m in rows])[col]
+    beta = np.array([m.beta for m in rows])[col]
+    gamma = np.array([m.gamma for m in rows])[col]
+    sf = np.exp(-((np.maximum(t - gamma, 0.0) / alpha) ** beta))
+    return sf[0] if single else sf
+
+
+def to_frame(models):
+    """
+    Returns stored models as a DataFrame indexed by id.
+    """
+    import pandas as pd
+
+    return pd.DataFrame(models, columns=StoredModel._fields).set_index("id")
+
+
+def main():
+    """
+    Stores per-part fits for a few monthly windows and answers reliability
+    queries from the store.
+    """
+    import timeit
+
+    import pandas as pd
+
+    from groupfit import fit_weibull_groups
+
+    rng = np.random.default_rng(0)
+    store = ModelStore()
+    for month in range(12):
+        rows = []
+        for part in range(200):
+            beta, alpha = 1.5 + part % 3, 1000.0 * (1 + part % 5)
+            times = alpha * rng.weibull(beta, 50)
+            rows.append(
+                pd.DataFrame(
+                    {"group_id": f"P{part:03d}", "time": np.minimum(times, alpha), "censored": times > alpha}
+                )
+            )
+        fits = fit_weibull_groups(pd.concat(rows))
+        fits["window_start"], fits["window_end"] = 720.0 * month, 720.0 * (month + 1)
+        store.add_many(fits)
+    print(store.stats())
+
+    model = store.latest("P007", at=4000)
+    print(model.asset, model.window_start, model.window_end, round(model.alpha), round(model.beta, 3))
+    print("R(100, 500, 1000) =", reliability_at(model, [100, 500, 1000]))
+
+    n = 10_000
+    lookup = timeit.timeit(lambda: reliability_at(store.latest("P007", at=4000), 500.0), number=n)
+    print(f"latest + reliability_at: {lookup / n * 1e6:.1f} us per query")
+
+    window = store.query(start=3000, end=5000)
+    sf = reliability_at(window, np.linspace(0, 2000, 5))
+    print(f"{len(window)} models overlapping [3000, 5000], SF grid {sf.shape}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+# Incremental Weibull 2P maximum likelihood estimation for data that arrives
+# a few failures or survivors at a time.
+#
+# The profile score only needs sums of exp(beta * x) * x**j (x being a shifted
+# log time) for j = 0, 1, 2. The estimator keeps the moments
+#
+#     M_k = sum(exp(b0 * x) * x**k),   k = 0 .. order + 2,
+#
+# at an anchor shape b0, and evaluates the sums at any nearby beta from the
+# Taylor series in (beta - b0). New data is added to the moments at the
+# anchor in O(new data * order), and each Newton step costs O(order), so an
+# update never revisits the old data. When beta drifts far enough from the
+# anchor that the truncated series could lose accuracy, the moments are
+# rebuilt at the new beta: exactly from the kept history, or (with
+# keep_history=False) by re-expanding the series in steps short enough for it
+# to stay accurate. Each such step loses a little accuracy, so without the
+# history the estimate drifts from a full refit when beta moves a long way
+# (many steps) after most of the data has arrived.
+
+import math
+
+import numpy as np
+
+from weibullfit import WeibullFit, _covariance, _menon_start, _newton_step
+
+
+class IncrementalWeibull:
+    """
+    Weibull 2P MLE that is updated in place as failures and survivors arrive.
+
+    Parameters:
+    order (int): Number of Taylor terms used around the anchor shape.
+    keep_history (bool): Keep every time seen so that re-anchoring (and
+    refresh()) is exact. Without it memory use is O(order) but re-anchoring
+    goes through the truncated series and is only approximate.
+    tol (float): Relative convergence tolerance on beta.
+    max_iter (int): Maximum number of Newton iterations per update.
+    series_tol (float): Bound on the relative truncation error of the series
+    before the moments are re-anchored.
+    """
+
+    def __init__(self, order=16, keep_history=True, tol=1e-10, max_iter=50, series_tol=1e-12):
+        self.order = order
+        self.keep_history = keep_history
+        self.tol = tol
+        self.max_iter = max_iter
+        self.series_tol = series_tol
+        self.n = 0
+        self.n_failures = 0
+        self.sum_fail_logt = 0.0
+        self.sum_sq_fail_logt = 0.0
+        self._fail_range = (math.inf, -math.inf)  # smallest, largest log failure time
+        self.fit = None
+        self._shift = None  # c, the log time the x values are measured from
+        self._anchor = None  # b0
+        # Without the history, re-expanding the series truncates the highest
+        # moments; 2 * order extra ones keep that error away from the terms the
+        # score uses for longer.
+        self._moments = np.zeros(order + 3 + (0 if keep_history else 2 * order))
+        self._span = 0.0  # largest |x| seen, for the truncation bound
+        self._history = []
+        # The z = |beta - b0| * span up to which the truncation bound stays
+        # within series_tol, by bisection on its (increasing) logarithm.
+        m = order + 1
+        lo, hi = 0.0, 50.0
+        for _ in range(60):
+            z = 0.5 * (lo + hi)
+            if m * math.log(z) - math.lgamma(m + 1) + z > math.log(series_tol):
+                hi = z
+            else:
+                lo = z
+        self._reach = lo
+
+    @property
+    def alpha(self):
+        return None if self.fit is None else self.fit.alpha
+
+    @property
+    def beta(self):
+        return None if self.fit is None else self.fit.beta
+
+    def _accumulate(self, logt):
+        x = logt - self._shift
+        e = np.exp(self._anchor * x)
+        for k in range(self._moments.size):
+            self._moments[k] += e.sum()
+            e = e * x
+
+    def _reshift(self, new_shift):
+        # Exact change of the x origin: x' = x - d, so
+        # M'_k = exp(-b0 * d) * sum_j C(k, j) (-d)**(k - j) M_j.
+        d = new_shift - self._shift
+        old = self._moments
+        new = np.zeros_like(old)
+        for k in range(old.size):
+            new[k] = sum(math.comb(k, j) * (-d) ** (k - j) * old[j] for j in range(k + 1))
+        self._moments = new * math.exp(-self._anchor * d)
+        self._shift = new_shift
+        self._span += abs(d)
+
+    def _sums(self, beta, count):
+        # sum(exp(beta * x) * x**j) for j < count from the series at the anchor.
+        delta = beta - self._anchor
+        k = np.arange(self.order + 1)
+        coeffs = delta**k / np.array([math.factorial(i) for i in k], dtype=np.float64)
+        return np.array([coeffs @ self._moments[j : j + self.order + 1] for j in range(count)])
+
+    def _truncation_bound(self, beta):
+        # z**m / m! * exp(z), in logs so that a far-off beta cannot overflow.
+        z = abs(beta - self._anchor) * self._span
+        if z == 0.0:
+            return 0.0
+        m = self.order + 1
+        return math.exp(min(m * math.log(z) - math.lgamma(m + 1) + z, 700.0))
+
+    def _start(self):
+        # Menon's estimate from the failures seen so far.
+        r = max(self.n_failures, 1)
+        return float(_menon_start(self.sum_sq_fail_logt / r - (self.sum_fail_logt / r) ** 2))
+
+    def _reanchor(self, beta):
+        # Moves the anchor to beta and returns the new anchor. Without the
+        # history the moments are re-expanded from the series, which is only
+        # accurate within _reach of the old anchor, so the anchor moves at
+        # most that far towards beta.
+        if self.keep_history:
+            self._anchor = float(beta)
+            self._moments[:] = 0.0
+            self._accumulate(np.concatenate(self._history))
+        else:
+            size = self._moments.size
+            reach = self._reach / self._span
+            delta = min(max(beta - self._anchor, -reach), reach)
+            if self._anchor + delta <= 0:
+                delta = -0.5 * self._anchor
+            new = np.zeros(size)
+            for j in range(size):
+                k = np.arange(size - j)
+                fact = np.array([math.factorial(i) for i in k], dtype=np.float64)
+                new[j] = (delta**k / fact) @ self._moments[j:]
+            self._moments = new
+            self._anchor = float(self._anchor + delta)
+        return self._anchor
+
+    def update(self, failures=None, right_censored=None):
+        """
+        Adds new failures and/or right censored survivors and re-estimates.
+
+        Parameters:
+        failures (array_like or None): New failure times.
+        right_censored (array_like or None): New right censored times.
+
+        Returns:
+        WeibullFit: The updated fit. None while there are no failures yet,
+        and nan parameters with converged False while there are fewer than
+        two distinct failure times (the likelihood then has no maximum).
+        """
+        failures = np.asarray([] if failures is None else failures, dtype=np.float64).ravel()
+        right_censored = np.asarray(
+            [] if right_censored is None else right_censored, dtype=np.float64
+        ).ravel()
+        logt = np.log(np.concatenate((failures, right_censored)))
+        if logt.size == 0:
+            return self.fit
+        if not np.all(np.isfinite(logt)):
+            raise ValueError("All failure and right censored times must be positive.")
+        log_fail = logt[: failures.size]
+
+        self.n += logt.size
+        self.n_failures += log_fail.size
+        self.sum_fail_logt += float(log_fail.sum())
+        self.sum_sq_fail_logt += float((log_fail * log_fail).sum())
+        if log_fail.size:
+            low, high = self._fail_range
+            self._fail_range = (min(low, float(log_fail.min())), max(high, float(log_fail.max())))
+        if self.keep_history:
+            self._history.append(logt)
+
+        if self._anchor is None:
+            self._shift = float(logt.max())
+            self._anchor = self._start()
+        elif logt.max() > self._shift:
+            self._reshift(float(logt.max()))
+        self._span = max(self._span, float(np.abs(logt - self._shift).max()))
+        self._accumulate(logt)
+
+        if self.n_failures == 0:
+            return None
+        return self._solve()
+
+    def _solve(self):
+        low, high = self._fail_range
+        if not low < high:
+            nan = math.nan
+            self.fit = WeibullFit(nan, nan, 0.0, nan, nan, nan, nan, n_iter=0, converged=False)
+            return self.fit
+        r = self.n_failures
+        mean_fail_x = self.sum_fail_logt / r - self._shift
+        # Warm start from the last estimate only if it was a proper one.
+        beta = self.fit.beta if self.fit is not None and self.fit.converged else self._start()
+        converged = False
+        lo, hi = 0.0, math.inf
+        # Newton on the series. A step that leaves the range where the series
+        # is accurate re-anchors there (or, without history, part of the way)
+        # and the iteration carries on from the new anchor.
+        for n_iter in range(1, self.max_iter + 1):
+            s0, s1, s2 = self._sums(beta, 3)
+            step, lo, hi = _newton_step(beta, lo, hi, True, s0, s1, s2, mean_fail_x)
+            step = float(step)
+            converged = abs(step - beta) <= self.tol * beta
+            beta = step
+            if self._truncation_bound(beta) > self.series_tol:
+                beta = self._reanchor(beta)
+                converged = False
+            elif converged:
+                break
+        s0 = self._sums(beta, 1)[0]
+        if not (converged and s0 > 0):
+            nan = math.nan
+            self.fit = WeibullFit(nan, nan, 0.0, nan, nan, nan, nan, n_iter=n_iter, converged=False)
+            return self.fit
+
+        log_alpha = self._shift + math.log(s0 / r) / beta
+        # Sums of z * u**k with u = x - a, a = log(alpha) - c.
+        a = log_alpha - self._shift
+        p0, p1, p2 = self._sums(beta, 3) * math.exp(-beta * a)
+        sz = p0
+        szu = p1 - a * p0
+        szu2 = p2 - 2 * a * p1 + a * a * p0
+        alpha = math.exp(log_alpha)
+        loglik = r * math.log(beta) - r * beta * log_alpha + (beta - 1.0) * self.sum_fail_logt - sz
+        var_alpha, var_beta, cov_ab = _covariance(r, alpha, beta, sz, szu, szu2)
+        self.fit = WeibullFit(
+            alpha=alpha,
+            beta=float(beta),
+            gamma=0.0,
+            alpha_SE=float(np.sqrt(abs(var_alpha))),
+            beta_SE=float(np.sqrt(abs(var_beta))),
+            Cov_alpha_beta=float(cov_ab),
+            loglik=float(loglik),
+            n_iter=n_iter,
+            converged=True,
+        )
+        return self.fit
+
+    def refresh(self):
+        """
+        Rebuilds the moments exactly from the kept history at the current
+        beta and re-solves. Requires keep_history=True.
+        """
+        if not self.keep_history:
+            raise RuntimeError("refresh() needs keep_history=True")
+        if self.fit is None:
+            return None
+        if self.fit.converged:
+            self._reanchor(self.fit.beta)
+        return self._solve()
@@ -0,0 +1,244 @@
+# Reliability queries over many fitted models at once.
+#
+# A ReliabilityGrid holds the parameters of n Weibull (2P or 3P) or
+# Exponential models as arrays, in the Weibull form used by modelstore.py
+# (an Exponential with rate Lambda is alpha = 1 / Lambda, beta = 1), and
+# evaluates
+#
+#   CHF(t) = ((t - gamma) / alpha) ** beta,  SF = exp(-CHF),  CDF = 1 - SF,
+#   HF(t) = beta / alpha * ((t - gamma) / alpha) ** (beta - 1),
+#   quantile(q) = gamma + alpha * (-log(1 - q)) ** (1 / beta)
+#
+# over (models x times) or (models x probabilities) grids by broadcasting.
+# Because SF is decreasing, "does model i drop below reliability r before
+# time t" is the same as "is its (1 - r) quantile below t", so threshold
+# questions are one quantile evaluation per model rather than a search.
+#
+# Tables over a fixed time grid (e.g. the warranty periods being planned
+# for) are computed once and cached, keyed by the grid; first_crossing
+# searches a cached table for the first grid time below a reliability level.
+
+from collections import OrderedDict
+
+import numpy as np
+
+
+class ReliabilityGrid:
+    """
+    Parameters of many Weibull or Exponential models.
+
+    Parameters:
+    alpha (array_like): Scale parameters.
+    beta (array_like): Shape parameters.
+    gamma (array_like or None): Location parameters (0 when None).
+    labels (array_like or None): Asset or part identifiers, one per model
+    (0..n-1 when None).
+    cache_size (int): Number of time grids whose tables are kept.
+    """
+
+    def __init__(self, alpha, beta, gamma=None, labels=None, cache_size=16):
+        self.alpha = np.atleast_1d(np.asarray(alpha, dtype=np.float64))
+        n = self.alpha.size
+        self.beta = np.broadcast_to(np.asarray(beta, dtype=np.float64), (n,)).copy()
+        self.gamma = np.zeros(n) if gamma is None else np.broadcast_to(
+            np.asarray(gamma, dtype=np.float64), (n,)
+        ).copy()
+        self.labels = np.arange(n) if labels is None else np.asarray(labels)
+        if self.labels.shape != (n,):
+            raise ValueError("labels must have one entry per model")
+        if np.any(self.alpha <= 0) or np.any(self.beta <= 0):
+            raise ValueError("alpha and beta must be positive")
+        for array in (self.alpha, self.beta, self.gamma):
+            array.flags.writeable = False
+        self.cache_size = cache_size
+        self._tables = OrderedDict()
+
+    @classmethod
+    def from_exponential(cls, Lambda, labels=None):
+        """Models with constant failure rates Lambda."""
+        Lambda = np.atleast_1d(np.asarray(Lambda, dtype=np.float64))
+        return cls(1.0 / Lambda, np.ones(Lambda.size), labels=labels)
+
+    @classmethod
+    def from_fits(cls, fits, labels=None):
+        """
+        Models from a list of WeibullFit results or StoredModel rows, or from
+        a DataFrame with alpha, beta and optionally gamma columns (e.g.
+        groupfit.fit_weibull_groups output, labelled by its index). Rows
+        without finite parameters are dropped.
+        """
+        if hasattr(fits, "columns"):
+            gamma = fits["gamma"].to_numpy() if "gamma" in fits.columns else None
+            alpha, beta = fits["alpha"].to_numpy(), fits["beta"].to_numpy()
+            labels = fits.index.to_numpy() if labels is None else labels
+        else:
+            alpha = np.array([f.alpha for f in fits], dtype=np.float64)
+            beta = np.array([f.beta for f in fits], dtype=np.float64)
+            gamma = np.array([f.gamma for f in fits], dtype=np.float64)
+            if labels is None and fits and hasattr(fits[0], "asset"):
+                labels = [f.asset for f in fits]
+        keep = np.isfinite(alpha) & np.isfinite(beta)
+        if not keep.all():
+            labels = None if labels is None else np.asarray(labels)[keep]
+            alpha, beta = alpha[keep], beta[keep]
+            gamma = None if gamma is None else gamma[keep]
+        return cls(alpha, beta, gamma, labels)
+
+    def __len__(self):
+        return self.alpha.size
+
+    def _columns(self, ndim):
+        # Parameters shaped to broadcast against a ndim-dimensional argument.
+        col = (slice(None),) + (None,) * ndim
+        return self.alpha[col], self.beta[col], self.gamma[col]
+
+    def CHF(self, t):
+        """Cumulative hazard, shape (n_models,) + t.shape."""
+        t = np.asarray(t, dtype=np.float64)
+        alpha, beta, gamma = self._columns(t.ndim)
+        return (np.maximum(t - gamma, 0.0) / alpha) ** beta
+
+    def SF(self, t):
+        """Reliability, shape (n_models,) + t.shape."""
+        return np.exp(-self.CHF(t))
+
+    def CDF(self, t):
+        """Probability of failure by t, shape (n_models,) + t.shape."""
+        return -np.expm1(-self.CHF(t))
+
+    def HF(self, t):
+        """Hazard rate, shape (n_models,) + t.shape."""
+        t = np.asarray(t, dtype=np.float64)
+        alpha, beta, gamma = self._columns(t.ndim)
+        x = np.maximum(t - gamma, 0.0) / alpha
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = beta / alpha * x ** (beta - 1)
+        return np.where(t > gamma, values, 0.0)
+
+    def PDF(self, t):
+        """Density, shape (n_models,) + t.shape."""
+        return self.HF(t) * self.SF(t)
+
+    def quantile(self, q):
+        """
+        Time by which a fraction q of the units has failed.
+
+        Parameters:
+        q (array_like): Probabilities in [0, 1).
+
+        Returns:
+        ndarray: Times, shape (n_models,) + q.shape.
+        """
+        q = np.asarray(q, dtype=np.float64)
+        alpha, beta, gamma = self._columns(q.ndim)
+        return gamma + alpha * (-np.log1p(-q)) ** (1.0 / beta)
+
+    def b_life(self, percent):
+        """
+        B-life, e.g. b_life(10) is the B10 life (10% failed), shape
+        (n_models,) + percent.shape.
+        """
+        return self.quantile(np.asarray(percent, dtype=np.float64) / 100.0)
+
+    def time_to_reliability(self, reliability):
+        """Time at which reliability falls to the given level."""
+        return self.quantile(1.0 - np.asarray(reliability, dtype=np.float64))
+
+    def below(self, reliability, before):
+        """
+        Which models drop below a reliability level before a time.
+
+        Parameters:
+        reliability (float): Reliability level, e.g. 0.95.
+        before (array_like): Time, or times.
+
+        Returns:
+        ndarray: Boolean mask of shape (n_models,) + before.shape.
+        """
+        before = np.asarray(before, dtype=np.float64)
+        crossing = self.time_to_reliability(reliability)
+        return crossing[(slice(None),) + (None,) * before.ndim] < before
+
+    def select(self, mask):
+        """Labels of the models where mask is true."""
+        return self.labels[np.asarray(mask, dtype=bool)]
+
+    def table(self, times, function="SF"):
+        """
+        Cached (n_models, n_times) table of SF, CDF, CHF or HF over a time
+        grid. The returned array is read-only and shared between calls.
+        """
+        times = np.ascontiguousarray(times, dtype=np.float64).ravel()
+        key = (function, times.tobytes())
+        table = self._tables.get(key)
+        if table is None:
+            table = getattr(self, function)(times)
+            table.flags.writeable = False
+            self._tables[key] = table
+            while len(self._tables) > self.cache_size:
+                self._tables.popitem(last=False)
+        else:
+            self._tables.move_to_end(key)
+        return table
+
+    def first_crossing(self, times, reliability):
+        """
+        First grid time at which each model's reliability is below a level.
+
+        Parameters:
+        times (array_like): Ascending time grid.
+        reliability (float): Reliability level.
+
+        Returns:
+        ndarray: Index into times per model, len(times) if the model stays
+        at or above the level over the whole grid.
+        """
+        below = self.table(times) < reliability
+        return np.where(below.any(axis=1), below.argmax(axis=1), below.shape[1])
+
+    def summary(self, percents=(1, 10, 50)):
+        """
+        Returns a DataFrame of B-lives per model, indexed by label.
+        """
+        import pandas as pd
+
+        lives = self.b_life(np.asarray(percents))
+        return pd.DataFrame(
+            lives, index=pd.Index(self.labels, name="model"), columns=[f"B{p:g}" for p in percents]
+        )
+
+
+def main():
+    """
+    Answers warranty questions for 100,000 simulated part fits.
+    """
+    import time
+
+    rng = np.random.default_rng(0)
+    n = 100_000
+    grid = ReliabilityGrid(
+        alpha=rng.uniform(2_000, 20_000, n),
+        beta=rng.uniform(0.8, 3.5, n),
+        labels=np.array([f"A{i:06d}" for i in range(n)]),
+    )
+
+    start = time.perf_counter()
+    mask = grid.below(0.95, 200)
+    elapsed = time.perf_counter() - start
+    print(f"{mask.sum()} of {n} assets fall below 95% reliability before 200 h ({elapsed * 1e3:.1f} ms)")
+    print("first few:", grid.select(mask)[:5])
+
+    warranty_periods = np.array([100, 200, 500, 1000, 2000])
+    start = time.perf_counter()
+    grid.table(warranty_periods)
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    index = grid.first_crossing(warranty_periods, 0.95)
+    warm = time.perf_counter() - start
+    print(f"SF table {cold * 1e3:.1f} ms, cached crossing search {warm * 1e3:.1f} ms")
+    print("assets by first warranty period below 95%:", np.bincount(index, minlength=6))
+    print(grid.summary().head())
+
+
+if __name__ == "__main__":
+    main()
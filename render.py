@@ -0,0 +1,171 @@
+# Rendering of the Weibull probability plot and survival function for fr.py.
+#
+# Everything here uses the object-oriented Figure API with an explicit Agg
+# canvas, never pyplot, so there is no shared global figure state and
+# concurrent requests cannot draw into each other's axes. The plotted data is
+# built first as plain series (graph_series) which can be returned as JSON for
+# the client to draw, or turned into PNG/SVG bytes.
+
+import io
+import json
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.ticker import NullFormatter, ScalarFormatter
+
+from stagetimer import SamplingProfiler, collect, stage
+from weibullfit import fit_weibull_2p
+
+
+# Unreliability levels marked on the probability plot's y axis.
+_PROBABILITY_TICKS = [0.001, 0.01, 0.05, 0.1, 0.2, 0.5, 0.632, 0.9, 0.99, 0.999]
+
+MEDIA_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+    "json": "application/json",
+}
+
+
+def _weibull_y(unreliability):
+    return np.log(-np.log1p(-np.asarray(unreliability, dtype=np.float64)))
+
+
+def graph_series(failing_times, n_points=200):
+    """
+    Builds the data behind the two plots without drawing anything.
+
+    Failure times are plotted at Benard's median rank approximation
+    (i - 0.3) / (n + 0.4), as reliability's plot_points does.
+
+    Parameters:
+    failing_times (array_like): Failure times in hours.
+    n_points (int): Number of points on the fitted curves.
+
+    Returns:
+    dict: JSON-serializable dict with the fitted alpha and beta, the
+    probability plot points and fitted line (x in hours, y as unreliability)
+    and the survival function points and fitted curve.
+    """
+    times = np.sort(np.asarray(failing_times, dtype=np.float64))
+    with stage("fit"):
+        fit = fit_weibull_2p(times)
+    if not fit.converged:
+        raise ValueError("The Weibull fit did not converge.")
+    n = times.size
+    ranks = (np.arange(1, n + 1) - 0.3) / (n + 0.4)
+
+    lo = min(times[0], fit.alpha * (-np.log(0.999)) ** (1 / fit.beta))
+    hi = max(times[-1], fit.alpha * (-np.log(0.001)) ** (1 / fit.beta))
+    line_x = np.geomspace(lo, hi, n_points)
+    curve_x = np.linspace(0.0, hi, n_points)
+
+    return {
+        "alpha": fit.alpha,
+        "beta": fit.beta,
+        "probability_plot": {
+            "points_x": times.tolist(),
+            "points_y": ranks.tolist(),
+            "line_x": line_x.tolist(),
+            "line_y": (-np.expm1(-((line_x / fit.alpha) ** fit.beta))).tolist(),
+        },
+        "survival_function": {
+            "points_x": times.tolist(),
+            "points_y": (1 - ranks).tolist(),
+            "curve_x": curve_x.tolist(),
+            "curve_y": np.exp(-((curve_x / fit.alpha) ** fit.beta)).tolist(),
+        },
+    }
+
+
+def render_figure(series):
+    """
+    Draws the probability plot and survival function from graph_series.
+
+    Parameters:
+    series (dict): Output of graph_series.
+
+    Returns:
+    Figure: A new figure attached to its own Agg canvas.
+    """
+    fig = Figure(figsize=(10, 4.5))
+    FigureCanvasAgg(fig)
+    ax_prob, ax_sf = fig.subplots(1, 2)
+
+    prob = series["probability_plot"]
+    label = f"Fitted Weibull_2P (α={series['alpha']:.2f}, β={series['beta']:.2f})"
+    ax_prob.plot(prob["line_x"], _weibull_y(prob["line_y"]), color="steelblue", label=label)
+    ax_prob.scatter(prob["points_x"], _weibull_y(prob["points_y"]), color="k", s=12, zorder=3)
+    ax_prob.set_xscale("log")
+    # Plain labels instead of mathtext 10^x ones; laying out text is most of
+    # the cost of drawing the figure.
+    ax_prob.xaxis.set_major_formatter(ScalarFormatter())
+    ax_prob.xaxis.set_minor_formatter(NullFormatter())
+    ax_prob.set_yticks(_weibull_y(_PROBABILITY_TICKS))
+    ax_prob.set_yticklabels([f"{100 * p:g}%" for p in _PROBABILITY_TICKS])
+    ax_prob.set_ylim(_weibull_y(0.001), _weibull_y(0.999))
+    ax_prob.grid(True, which="both", alpha=0.4)
+    ax_prob.set_xlabel("Time (hours)")
+    ax_prob.set_ylabel("Probability of Failure")
+    ax_prob.set_title("Weibull Probability Plot")
+    ax_prob.legend(fontsize="small")
+
+    sf = series["survival_function"]
+    ax_sf.plot(sf["curve_x"], sf["curve_y"], label="Fitted Distribution")
+    ax_sf.scatter(sf["points_x"], sf["points_y"], color="k", s=12, zorder=3)
+    ax_sf.set_ylim(0, 1.05)
+    ax_sf.set_xlabel("Time (hours)")
+    ax_sf.set_ylabel("Survival Function (SF)")
+    ax_sf.set_title("Weibull Survival Function")
+    ax_sf.legend()
+    ax_sf.grid(True)
+
+    # Fixed margins rather than tight_layout(), which needs an extra draw.
+    fig.subplots_adjust(left=0.1, right=0.98, bottom=0.12, top=0.92, wspace=0.25)
+    return fig
+
+
+def render(failing_times, fmt="svg"):
+    """
+    Renders the plots for a set of failure times.
+
+    Parameters:
+    failing_times (array_like): Failure times in hours.
+    fmt (str): "png", "svg" or "json" (the graph_series data for the
+    client to draw).
+
+    Returns:
+    bytes: The encoded image or JSON document.
+    """
+    if fmt not in MEDIA_TYPES:
+        raise ValueError(f"Unsupported graph format: {fmt}")
+    with stage("series"):
+        series = graph_series(failing_times)
+    if fmt == "json":
+        with stage("encode"):
+            return json.dumps(series, separators=(",", ":")).encode("utf-8")
+    with stage("draw"):
+        fig = render_figure(series)
+    with stage("encode"):
+        buf = io.BytesIO()
+        fig.savefig(buf, format=fmt)
+    return buf.getvalue()
+
+
+def render_timed(failing_times, fmt="svg", profile=False):
+    """
+    render() for use in a worker process: also returns the stage durations
+    measured there, as {stage: seconds}, for the caller to record with
+    stagetimer.observe(). With profile=True the render runs under the
+    sampling profiler and its samples ({stack: count}) are returned as well,
+    otherwise None.
+    """
+    profiler = SamplingProfiler().start() if profile else None
+    with collect() as durations:
+        try:
+            body = render(failing_times, fmt)
+        finally:
+            if profiler is not None:
+                profiler.stop()
+    return body, durations, None if profiler is None else dict(profiler.samples)
@@ -0,0 +1,287 @@
+# Repairable system analysis for fleets with repeated failures per unit.
+#
+# The input is an event log with one row per failure, (unit_id, event_time,
+# end_of_observation), plus a row with a missing event_time for every unit
+# that never failed. A unit is observed from 0 to its end of observation and
+# is repaired and returned to service after each failure.
+#
+# Everything is computed from one sort of the event times:
+#
+#   mcf             Nelson's non-parametric mean cumulative function, the
+#                   expected number of failures per unit by time t, with
+#                   its variance and log-transformed bounds. At each event
+#                   time the increment is d/n (d failures among the n units
+#                   still observed).
+#   fit_crow_amsaa  The Crow-AMSAA (NHPP power law) model, expected failures
+#                   per unit N(t) = Lambda * t ** beta, fitted by maximum
+#                   likelihood to all units together, each time truncated at
+#                   its own end of observation.
+#   mtbf_trend      Failures and unit-hours of exposure per time bin, whose
+#                   ratio is the instantaneous MTBF of the fleet at that age.
+#
+# failurerate.calculate_mtbf is total time / failures, which is only right
+# when beta = 1; instantaneous_mtbf gives 1 / (Lambda * beta * t **
+# (beta - 1)) from the fitted model.
+
+from collections import namedtuple
+
+import numpy as np
+from scipy.optimize import brentq
+from scipy.special import ndtri
+
+RecurrentData = namedtuple("RecurrentData", ["unit", "time", "end", "labels"])
+RecurrentData.__doc__ = """
+An event log prepared by recurrent_data.
+
+unit and time are the unit code and time of every failure, sorted by time;
+end is the end of observation of each unit and labels its unit_id.
+"""
+
+MCF = namedtuple("MCF", ["time", "at_risk", "events", "mcf", "variance", "lower", "upper"])
+
+CrowAMSAA = namedtuple(
+    "CrowAMSAA",
+    ["beta", "Lambda", "beta_SE", "Lambda_SE", "Cov_beta_Lambda", "loglik", "n_failures", "n_units"],
+)
+CrowAMSAA.__doc__ = """
+Result of fit_crow_amsaa. The expected number of failures per unit by age t
+is Lambda * t ** beta; beta < 1 means reliability growth (failures becoming
+rarer), beta > 1 wear-out.
+"""
+
+MTBFTrend = namedtuple("MTBFTrend", ["start", "end", "failures", "exposure", "mtbf"])
+
+
+def recurrent_data(unit_id, event_time, end_of_observation):
+    """
+    Builds a RecurrentData from event log columns.
+
+    Parameters:
+    unit_id (array_like): Unit of each row.
+    event_time (array_like): Failure time of each row, NaN for the row of a
+    unit without failures.
+    end_of_observation (array_like): End of observation of each row's unit
+    (the largest value per unit is used).
+
+    Returns:
+    RecurrentData
+    """
+    labels, unit = np.unique(np.asarray(unit_id), return_inverse=True)
+    unit = unit.ravel()
+    event_time = np.asarray(event_time, dtype=np.float64).ravel()
+    end_row = np.asarray(end_of_observation, dtype=np.float64).ravel()
+    end = np.full(labels.size, -np.inf)
+    np.maximum.at(end, unit, end_row)
+
+    failed = ~np.isnan(event_time)
+    unit, event_time = unit[failed], event_time[failed]
+    if np.any(event_time <= 0):
+        raise ValueError("Event times must be positive.")
+    if np.any(event_time > end[unit]):
+        raise ValueError("Event times must not be after the unit's end of observation.")
+    order = np.argsort(event_time, kind="stable")
+    return RecurrentData(unit[order], event_time[order], end, labels)
+
+
+def from_frame(df, unit_col="unit_id", time_col="event_time", end_col="end_of_observation"):
+    """
+    Builds a RecurrentData from an event log DataFrame.
+    """
+    return recurrent_data(df[unit_col].to_numpy(), df[time_col].to_numpy(), df[end_col].to_numpy())
+
+
+def from_systems(systems):
+    """
+    Builds a RecurrentData from reliability's MCF_nonparametric format: one
+    list per unit of its failure times followed by its end of observation.
+    """
+    unit, time, end = [], [], []
+    for i, system in enumerate(systems):
+        system = sorted(system)
+        unit += [i] * len(system)
+        time += system[:-1] + [np.nan]
+        end += [system[-1]] * len(system)
+    return recurrent_data(unit, time, end)
+
+
+def mcf(data, alpha=0.05):
+    """
+    Non-parametric mean cumulative function.
+
+    Parameters:
+    data (RecurrentData): The event log.
+    alpha (float): The bounds are at the 1 - alpha confidence level.
+
+    Returns:
+    MCF: Per distinct event time, the units under observation, the number
+    of failures, the MCF, Nelson's variance and the lower and upper bounds.
+    Tied failures form one step; reliability's MCF_nonparametric adds them
+    one at a time, so its variance differs slightly at tied times.
+    """
+    starts = np.flatnonzero(np.r_[True, data.time[1:] != data.time[:-1]]) if data.time.size else []
+    time = data.time[starts]
+    events = np.diff(np.r_[starts, data.time.size]).astype(np.float64)
+    at_risk = data.end.size - np.searchsorted(np.sort(data.end), time, side="left")
+
+    # Sum over units of (failures at the time)**2: the same unit can fail
+    # more than once at one time.
+    pair = np.r_[True, (data.time[1:] != data.time[:-1]) | (data.unit[1:] != data.unit[:-1])]
+    if not np.all(pair):
+        per_unit = np.diff(np.r_[np.flatnonzero(pair), data.time.size]).astype(np.float64)
+        time_index = np.searchsorted(time, data.time[pair])
+        squares = np.bincount(time_index, per_unit**2, time.size)
+    else:
+        squares = events
+
+    mean = np.cumsum(events / at_risk)
+    variance = np.cumsum((squares - events**2 / at_risk) / at_risk**2)
+    half = ndtri(1 - alpha / 2) * np.sqrt(variance) / mean
+    return MCF(time, at_risk, events, mean, variance, mean * np.exp(-half), mean * np.exp(half))
+
+
+def fit_crow_amsaa(data):
+    """
+    Maximum likelihood fit of the Crow-AMSAA power law to all units.
+
+    The log-likelihood is n * log(Lambda * beta) + (beta - 1) * sum(log t)
+    - Lambda * sum(T ** beta) over failure times t and ends of observation
+    T. Lambda has the closed form n / sum(T ** beta), which leaves one
+    monotone equation in beta.
+
+    Parameters:
+    data (RecurrentData): The event log.
+
+    Returns:
+    CrowAMSAA
+    """
+    n = data.time.size
+    if n < 2:
+        raise ValueError("At least two failures are required to fit the Crow-AMSAA model.")
+    end = data.end[data.end > 0]
+    log_end = np.log(end)
+    # Scale by the longest observation so T ** beta stays in range.
+    shift = log_end.max()
+    x_end = log_end - shift
+    sum_log_t = np.log(data.time).sum() - n * shift
+
+    def score(beta):
+        w = np.exp(beta * x_end)
+        return n / beta + sum_log_t - n * np.dot(w, x_end) / w.sum()
+
+    # score is decreasing in beta; bracket its root.
+    lo, hi = 1e-3, 1.0
+    while score(hi) > 0:
+        lo, hi = hi, 2 * hi
+    beta = brentq(score, lo, hi, xtol=1e-12)
+
+    w = np.exp(beta * x_end)
+    s0, s1, s2 = w.sum(), np.dot(w, log_end), np.dot(w, log_end**2)
+    log_s0 = np.log(s0) + beta * shift
+    Lambda = np.exp(np.log(n) - log_s0)
+    loglik = n * np.log(Lambda * beta) + (beta - 1) * np.log(data.time).sum() - n
+
+    # Observed information in (beta, Lambda); sums of T**beta * log(T)**k
+    # are s_k * exp(beta * shift).
+    scale = np.exp(beta * shift)
+    h_bb = n / beta**2 + Lambda * s2 * scale
+    h_bl = s1 * scale
+    h_ll = n / Lambda**2
+    det = h_bb * h_ll - h_bl**2
+    return CrowAMSAA(
+        beta=float(beta),
+        Lambda=float(Lambda),
+        beta_SE=float(np.sqrt(h_ll / det)),
+        Lambda_SE=float(np.sqrt(h_bb / det)),
+        Cov_beta_Lambda=float(-h_bl / det),
+        loglik=float(loglik),
+        n_failures=int(n),
+        n_units=int(data.end.size),
+    )
+
+
+def expected_failures(fit, t):
+    """Expected cumulative failures per unit by age t."""
+    return fit.Lambda * np.asarray(t, dtype=np.float64) ** fit.beta
+
+
+def instantaneous_mtbf(fit, t):
+    """Instantaneous MTBF, 1 / failure intensity, at age t."""
+    t = np.asarray(t, dtype=np.float64)
+    return 1.0 / (fit.Lambda * fit.beta * t ** (fit.beta - 1))
+
+
+def cumulative_mtbf(fit, t):
+    """Age t divided by the expected failures per unit by t."""
+    t = np.asarray(t, dtype=np.float64)
+    return t ** (1 - fit.beta) / fit.Lambda
+
+
+def mtbf_trend(data, edges):
+    """
+    Observed MTBF per age bin.
+
+    Parameters:
+    data (RecurrentData): The event log.
+    edges (array_like): Ascending bin edges in age, e.g.
+    np.linspace(0, 10_000, 21).
+
+    Returns:
+    MTBFTrend: Per bin, its start and end, the number of failures, the
+    unit-hours observed in it and their ratio (inf for bins without
+    failures).
+    """
+    edges = np.asarray(edges, dtype=np.float64)
+    failures = np.histogram(data.time, edges)[0]
+
+    # Unit-hours observed below each edge: sum of min(T, edge) over units,
+    # from the sorted ends and their prefix sums.
+    ends = np.sort(data.end)
+    below = np.searchsorted(ends, edges, side="right")
+    prefix = np.r_[0.0, np.cumsum(ends)]
+    observed = prefix[below] + edges * (ends.size - below)
+    exposure = np.diff(observed)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mtbf = np.where(failures > 0, exposure / failures, np.inf)
+    return MTBFTrend(edges[:-1], edges[1:], failures, exposure, mtbf)
+
+
+def main():
+    """
+    Analyses a simulated fleet of 200,000 repairable units, about a million
+    failures, whose failure intensity grows with age (beta = 1.3).
+    """
+    import time
+
+    rng = np.random.default_rng(0)
+    n_units, beta, Lambda = 200_000, 1.3, 2e-4
+    end = rng.uniform(1_000, 5_000, n_units)
+    # Power law NHPP: event ages are Lambda-inverted cumulative sums of unit
+    # exponential gaps.
+    n_max = 40
+    gaps = rng.exponential(size=(n_units, n_max)).cumsum(axis=1)
+    ages = (gaps / Lambda) ** (1 / beta)
+    unit = np.broadcast_to(np.arange(n_units)[:, None], ages.shape)
+    keep = ages <= end[:, None]
+    unit_id = np.r_[unit[keep], np.arange(n_units)]
+    event_time = np.r_[ages[keep], np.full(n_units, np.nan)]
+    end_of_observation = end[unit_id]
+
+    start = time.perf_counter()
+    data = recurrent_data(unit_id, event_time, end_of_observation)
+    prepared = time.perf_counter()
+    curve = mcf(data)
+    fit = fit_crow_amsaa(data)
+    trend = mtbf_trend(data, np.linspace(0, 5_000, 11))
+    done = time.perf_counter()
+    print(f"{data.time.size} failures on {n_units} units")
+    print(f"sort {prepared - start:.2f} s, MCF + Crow-AMSAA + trend {done - prepared:.2f} s")
+    print(f"beta = {fit.beta:.4f} +/- {fit.beta_SE:.4f}, Lambda = {fit.Lambda:.3e}")
+    at = np.searchsorted(curve.time, 3000)
+    print(f"MCF(3000) = {curve.mcf[at]:.3f} ({curve.lower[at]:.3f}, {curve.upper[at]:.3f}),"
+          f" model {expected_failures(fit, 3000):.3f}")
+    for s, e, m in zip(trend.start, trend.end, trend.mtbf):
+        print(f"  {s:5.0f}-{e:5.0f} h: observed MTBF {m:7.1f}, model {instantaneous_mtbf(fit, (s + e) / 2):7.1f}")
+
+
+if __name__ == "__main__":
+    main()
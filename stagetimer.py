@@ -0,0 +1,221 @@
+# Always-on stage timers and an opt-in sampling profiler for the web app.
+#
+# Code marks the stages of a request with
+#
+#   with stage("fit"):
+#       ...
+#
+# which adds the elapsed time to a per-stage histogram (served in Prometheus
+# text format by metrics_text(), i.e. fr.py's /metrics) and to the durations
+# of the current request, if one is being collected (see begin() / end()),
+# for its structured log line. A stage costs two perf_counter() calls and a
+# lock; there is nothing else to switch off.
+#
+# Stages that run in a worker process are collected there with collect() and
+# handed back to the parent with the result, which replays them with
+# observe() (see render.render_timed). The histograms are per process, so
+# under a multi-process server each worker reports its own.
+#
+# SamplingProfiler samples one thread's Python stack from a background thread
+# via sys._current_frames() and returns it in the "folded" format read by
+# flamegraph.pl and speedscope (one "root;caller;callee count" line per
+# distinct stack). It only runs while a profile is being taken.
+
+import bisect
+import contextvars
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Upper bounds in seconds, as in prometheus_client's default buckets.
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_durations = contextvars.ContextVar("stage_durations", default=None)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram of durations in seconds.
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # the last one is +Inf
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+
+class StageTimers:
+    """
+    Thread-safe registry of one histogram per stage.
+
+    Parameters:
+    name (str): Metric name used in the Prometheus output.
+    buckets (tuple): Histogram bucket upper bounds in seconds.
+    """
+
+    def __init__(self, name="weibull_stage_seconds", buckets=BUCKETS):
+        self.name = name
+        self.buckets = buckets
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        """
+        Records one duration for stage, in its histogram and in the current
+        request's durations.
+        """
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram(self.buckets)
+            histogram.observe(seconds)
+        durations = _durations.get()
+        if durations is not None:
+            durations[stage] = durations.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def metrics_text(self):
+        """
+        Returns the histograms in the Prometheus text exposition format.
+        """
+        lines = [
+            f"# HELP {self.name} Time spent in each stage of the analysis pipeline.",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            for stage in sorted(self._histograms):
+                h = self._histograms[stage]
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), h.counts):
+                    cumulative += count
+                    le = bound if bound == "+Inf" else repr(float(bound))
+                    lines.append(f'{self.name}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+                lines.append(f'{self.name}_sum{{stage="{stage}"}} {h.sum!r}')
+                lines.append(f'{self.name}_count{{stage="{stage}"}} {cumulative}')
+        return "\n".join(lines) + "\n"
+
+
+# The process-wide registry used by stage() and fr.py.
+timers = StageTimers()
+
+
+def stage(name):
+    """
+    Context manager timing a stage in the process-wide registry.
+    """
+    return timers.stage(name)
+
+
+def observe(name, seconds):
+    """
+    Records a duration measured elsewhere (e.g. in a worker process).
+    """
+    timers.observe(name, seconds)
+
+
+def begin():
+    """
+    Starts collecting stage durations for the current request (thread or
+    context). Returns a token for end().
+    """
+    return _durations.set({})
+
+
+def end(token):
+    """
+    Stops collecting and returns the durations as {stage: seconds}.
+    """
+    durations = _durations.get()
+    _durations.reset(token)
+    return durations or {}
+
+
+@contextmanager
+def collect():
+    """
+    Collects the stage durations of the enclosed block into the yielded dict.
+    """
+    token = begin()
+    durations = _durations.get()
+    try:
+        yield durations
+    finally:
+        end(token)
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stack of one thread at a fixed interval.
+
+    Parameters:
+    thread_id (int or None): Thread to sample. Defaults to the thread that
+    calls start().
+    interval (float): Seconds between samples.
+    """
+
+    def __init__(self, thread_id=None, interval=0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+
+    def start(self):
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stops sampling and returns the profile in folded-stack format.
+        """
+        self._stop.set()
+        self._thread.join()
+        return self.folded()
+
+    def merge(self, samples, root):
+        """
+        Adds samples taken elsewhere, e.g. in a worker process, as
+        {stack: count}, under root as an extra outermost frame.
+        """
+        for stack, count in samples.items():
+            self.samples[f"{root};{stack}"] += count
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
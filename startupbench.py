@@ -0,0 +1,176 @@
+# Cold-start benchmark for the command line tools and the Flask app.
+#
+# Each target is imported (or run) in a fresh interpreter with
+# `python -X importtime`, whose stderr lists every module imported with its
+# own and cumulative time in microseconds. The cumulative time of the
+# top-level import, the wall time of the process and the slowest modules are
+# recorded per target, using the median over --repeat runs.
+#
+#   python startupbench.py                      print the numbers as JSON
+#   python startupbench.py --history bench.jsonl --baseline bench.json
+#
+# --history appends one JSON line per run so regressions can be tracked over
+# time. --baseline compares against a previous result and exits with status
+# 1 if any target got slower than --tolerance allows.
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# name -> (python arguments, module whose cumulative import time is reported)
+TARGETS = {
+    "fr": (["-c", "import fr"], "fr"),
+    "api": (["-c", "import api"], "api"),
+    "failurerate": (["-c", "import failurerate"], "failurerate"),
+    "weibullfit": (["-c", "import weibullfit"], "weibullfit"),
+    "cli": (["-c", "import cli"], "cli"),
+    "cli --help": (["cli.py", "--help"], None),
+    "cli metrics": (
+        [
+            "cli.py",
+            "metrics",
+            "--units=20",
+            "--operational-time=1000",
+            "--failing-times=550,480,680,790,860,620",
+            "--warranty-period=200",
+        ],
+        None,
+    ),
+}
+
+
+def parse_importtime(stderr):
+    """
+    Parses `python -X importtime` output.
+
+    Returns:
+    list: (module, self_us, cumulative_us, depth) tuples in import order.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def measure(args, module=None, top=10):
+    """
+    Runs one fresh interpreter and measures its startup.
+
+    Returns:
+    dict: wall_ms, import_ms (cumulative import time of module, or of all
+    top-level imports when module is None), n_modules and the top slowest
+    modules by self time.
+    """
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} failed:\n{proc.stderr[-2000:]}")
+    rows = parse_importtime(proc.stderr)
+    if module is None:
+        import_us = sum(r[2] for r in rows if r[3] == 1)
+    else:
+        import_us = next(r[2] for r in reversed(rows) if r[0] == module)
+    slowest = sorted(rows, key=lambda r: r[1], reverse=True)[:top]
+    return {
+        "wall_ms": wall * 1e3,
+        "import_ms": import_us / 1e3,
+        "n_modules": len(rows),
+        "slowest": {r[0]: r[1] / 1e3 for r in slowest},
+    }
+
+
+def run(targets=None, repeat=5, top=10):
+    """
+    Measures every target repeat times.
+
+    Returns:
+    dict: Target name -> median wall_ms and import_ms, n_modules and the
+    slowest modules of the median run.
+    """
+    results = {}
+    for name in targets or TARGETS:
+        args, module = TARGETS[name]
+        runs = sorted(
+            (measure(args, module, top) for _ in range(repeat)), key=lambda r: r["import_ms"]
+        )
+        median = runs[len(runs) // 2]
+        median["wall_ms"] = statistics.median(r["wall_ms"] for r in runs)
+        results[name] = median
+    return results
+
+
+def compare(results, baseline, tolerance, key="import_ms"):
+    """
+    Returns the entries whose key (a time in ms) grew by more than tolerance
+    (a fraction) over the baseline, as name -> (baseline_ms, current_ms).
+    """
+    slower = {}
+    for name, result in results.items():
+        if name in baseline:
+            before = baseline[name][key]
+            if result[key] > before * (1 + tolerance):
+                slower[name] = (before, result[key])
+    return slower
+
+
+def add_history_arguments(parser):
+    """
+    Adds the --history, --baseline and --tolerance options used by
+    save_and_check. Shared with benchsuite.py.
+    """
+    parser.add_argument("--history", help="JSON lines file to append this run to")
+    parser.add_argument("--baseline", help="JSON file from an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+
+
+def save_and_check(args, record, key, decimals=1):
+    """
+    Appends record to the --history file and compares record["results"] with
+    the --baseline file, printing every regression in key to stderr and
+    exiting with status 1 if there are any.
+    """
+    if args.history:
+        with open(args.history, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        baseline = baseline.get("results", baseline)
+        slower = compare(record["results"], baseline, args.tolerance, key)
+        for name, (before, after) in slower.items():
+            print(f"{name}: {before:.{decimals}f} ms -> {after:.{decimals}f} ms", file=sys.stderr)
+        if slower:
+            sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import times.")
+    parser.add_argument("targets", nargs="*", help=f"any of {', '.join(TARGETS)} (default: all)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest modules to keep")
+    add_history_arguments(parser)
+    args = parser.parse_args()
+
+    results = run(args.targets, args.repeat, args.top)
+    print(json.dumps(results, indent=2))
+    record = {"timestamp": time.time(), "python": sys.version.split()[0], "results": results}
+    save_and_check(args, record, "import_ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from altfit import _design, _start, fit_alt
+
+
+def _grouped():
+    # Failure and censoring times rounded to whole hours so that repeats can
+    # be grouped into weighted rows.
+    rng = np.random.default_rng(0)
+    stress = np.repeat([340.0, 370.0, 400.0], 60)
+    life = np.round(np.exp(-8.0 + 5000.0 / stress) * rng.weibull(1.8, stress.size))
+    life = np.maximum(life, 1.0)
+    failed = life < 3000
+    return life, stress, failed
+
+
+def test_censored_times_need_their_stresses():
+    with pytest.raises(ValueError):
+        fit_alt([100, 200, 300, 400], [340, 340, 370, 370], right_censored=[500, 500])
+    with pytest.raises(ValueError):
+        fit_alt([100, 200, 300, 400], [340, 340, 370, 370], right_censored_stress=[340, 370])
+
+
+def test_weights_must_match_the_rows():
+    with pytest.raises(ValueError):
+        fit_alt([100, 200, 300, 400], [340, 340, 370, 370], weights=[1, 2, 3])
+
+
+def _start_values(times, event, weight, stress, center, spread):
+    x, offset = _design("Exponential", stress)
+    return _start(np.log(times), event, weight, (x - center) / spread, offset, stress)
+
+
+def test_weighted_rows_match_expanded_data():
+    life, stress, failed = _grouped()
+    n_censored = (~failed).sum()
+    full = fit_alt(life[failed], stress[failed], np.full(n_censored, 3000.0), stress[~failed])
+
+    rows, counts = np.unique(np.c_[life[failed], stress[failed]], axis=0, return_counts=True)
+    levels, level_counts = np.unique(stress[~failed], return_counts=True)
+    weights = np.r_[counts, level_counts]
+    grouped = fit_alt(rows[:, 0], rows[:, 1], np.full(levels.size, 3000.0), levels, weights=weights)
+    assert grouped.n == full.n and grouped.n_failures == full.n_failures
+    assert grouped.beta == pytest.approx(full.beta, rel=1e-6)
+    assert grouped.loglik == pytest.approx(full.loglik, rel=1e-9)
+
+    # The start values weight each row by its units too.
+    center, spread = 1 / 370.0, 1e-4
+    weighted = _start_values(
+        np.r_[rows[:, 0], np.full(levels.size, 3000.0)],
+        np.r_[np.ones(counts.size), np.zeros(levels.size)],
+        weights,
+        np.r_[rows[:, 1], levels],
+        center,
+        spread,
+    )
+    expanded = _start_values(
+        np.r_[life[failed], np.full(n_censored, 3000.0)],
+        np.r_[np.ones(failed.sum()), np.zeros(n_censored)],
+        np.ones(stress.size),
+        np.r_[stress[failed], stress[~failed]],
+        center,
+        spread,
+    )
+    assert weighted == pytest.approx(expanded, rel=1e-8)
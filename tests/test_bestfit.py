@@ -0,0 +1,41 @@
+import numpy as np
+
+import bestfit
+from bestfit import _regression, plotting_positions, select
+from weibullfit import _gamma_upper, fit_weibull_2p
+
+
+def test_weibull_3p_without_interior_maximum_is_excluded():
+    # The 3P likelihood of this data peaks at the first failure time, which
+    # used to make Weibull_3P win on an unbounded log-likelihood.
+    result = select([550, 480, 680, 790, 860, 620], [1000] * 14, margin=np.inf)
+    row = result.table.loc["Weibull_3P"]
+    assert row["params"] is None
+    assert row["AIC"] == np.inf
+    assert result.best != "Weibull_3P"
+
+
+def test_weibull_3p_with_interior_maximum_is_kept():
+    rng = np.random.default_rng(0)
+    times = 50 + 100 * rng.weibull(2.0, 30)
+    result = select(times, candidates=("Weibull_2P", "Weibull_3P"), margin=np.inf)
+    params = result.table.at["Weibull_3P", "params"]
+    assert params is not None and 0 < params["gamma"] < times.min()
+
+
+def test_weibull_3p_at_the_search_bound_is_excluded(monkeypatch):
+    # The fit fit_weibull_3p used to return for this data: gamma at the
+    # search bound 95 with the profile likelihood still rising.
+    failures = np.array([100, 120, 130, 180, 200, 260, 300], dtype=np.float64)
+    two = fit_weibull_2p(failures - 95.0)
+    monkeypatch.setattr(bestfit, "fit_weibull_3p", lambda data: two._replace(gamma=95.0))
+    result = select(failures, margin=np.inf)
+    assert result.table.at["Weibull_3P", "params"] is None
+    assert result.table.at["Weibull_3P", "AIC"] == np.inf
+
+
+def test_weibull_3p_regression_grid_stays_below_the_search_bound():
+    times = np.array([100, 120, 130, 180, 200, 260, 300], dtype=np.float64)
+    t, F = plotting_positions(times, np.ones(times.size), np.ones(times.size))
+    start = _regression("Weibull_3P", t, F)
+    assert 0 <= start["gamma"] <= _gamma_upper(t)
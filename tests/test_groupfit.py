@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from groupfit import fit_weibull_codes, fit_weibull_groups
+from weibullfit import fit_weibull_2p
+
+
+def test_groups_match_single_fits():
+    rng = np.random.default_rng(0)
+    codes = rng.integers(0, 50, 5000)
+    times = rng.weibull(1.5, codes.size) * rng.uniform(100, 1000, 50)[codes]
+    events = (rng.random(codes.size) < 0.3).astype(np.float64)
+    fits = fit_weibull_codes(codes, times, events)
+    assert fits["converged"].all()
+    for g in (0, 17, 49):
+        rows = codes == g
+        single = fit_weibull_2p(times[rows & (events == 1)], times[rows & (events == 0)])
+        assert fits["alpha"].iat[g] == pytest.approx(single.alpha, rel=1e-9)
+        assert fits["beta"].iat[g] == pytest.approx(single.beta, rel=1e-9)
+        assert fits["beta_SE"].iat[g] == pytest.approx(single.beta_SE, rel=1e-6)
+
+
+def test_degenerate_groups_are_nan():
+    # With no observation after the failures the likelihood increases
+    # without bound in beta.
+    data = pd.DataFrame(
+        {
+            "part": ["ok"] * 4 + ["one"] * 3 + ["tied"] * 3 + ["none"] * 2,
+            "time": [100, 200, 300, 400, 900, 500, 500, 500, 500, 400, 700, 800],
+            "censored": [0, 0, 0, 1, 0, 1, 1, 0, 0, 1, 1, 1],
+        }
+    )
+    fits = fit_weibull_groups(data, "part", "time", "censored")
+    assert fits.loc["ok", "converged"]
+    assert np.isfinite(fits.loc["ok", "beta"])
+    for part in ("one", "tied", "none"):
+        assert not fits.loc[part, "converged"]
+        assert np.isnan(fits.loc[part, ["alpha", "beta", "loglik", "beta_SE"]].to_numpy(dtype=float)).all()
+    assert fits.loc["tied", "n_failures"] == 2
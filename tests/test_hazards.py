@@ -0,0 +1,32 @@
+import numpy as np
+
+from hazards import best_composite, fit_competing_risks, rank_combinations
+
+
+def _data():
+    rng = np.random.default_rng(0)
+    times = np.r_[300 * rng.weibull(1.5, 40), 250.0, np.full(20, 1000.0)]
+    modes = np.array(["wear"] * 40 + ["rare"] + [None] * 20, dtype=object)
+    return times, modes
+
+
+def test_single_failure_mode_is_not_fitted_as_weibull():
+    times, modes = _data()
+    fits = fit_competing_risks(times, modes)
+    rare = fits[(fits["mode"] == "rare") & (fits["kind"] == "Weibull")].iloc[0]
+    assert np.isnan(rare["alpha"]) and np.isnan(rare["beta"])
+    assert rare["AIC"] == np.inf
+    wear = fits[(fits["mode"] == "wear") & (fits["kind"] == "Weibull")].iloc[0]
+    assert np.isfinite(wear["AIC"])
+
+
+def test_unfittable_kinds_are_skipped_when_ranking():
+    times, modes = _data()
+    fits = fit_competing_risks(times, modes)
+    ranked = rank_combinations(fits, top=None)
+    assert len(ranked) == 3 * 2
+    assert "Weibull" not in set(ranked["rare"])
+    assert np.isfinite(ranked["AIC"]).all()
+    composite = best_composite(fits)
+    assert len(composite.modes) == 2
+    assert np.isfinite(composite.SF([100.0, 500.0])).all()
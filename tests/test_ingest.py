@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from ingest import fit_weibull_stream, summarize, weibull_loglik
+
+
+@pytest.fixture
+def logs(tmp_path):
+    good = tmp_path / "good.csv"
+    good.write_text("time,event\n550,1\n480,1\n680,1\n790,1\n860,1\n620,1\n1000,0\n")
+    bad = tmp_path / "bad.csv"
+    bad.write_text("time,event\n550,1\n0,1\n680,1\n,1\n860,1\n620,1\n1000,0\n")
+    return str(good), str(bad)
+
+
+def test_loglik_checks_chunks_with_supplied_stats(logs):
+    good, bad = logs
+    stats = summarize(good)
+    assert np.isfinite(weibull_loglik(good, 800.0, 2.0, stats=stats))
+    with pytest.raises(ValueError):
+        weibull_loglik(bad, 800.0, 2.0, stats=stats)
+    with pytest.raises(ValueError):
+        weibull_loglik(bad, 800.0, 2.0)
+
+
+def test_stream_fit_checks_chunks_with_supplied_stats(logs):
+    good, bad = logs
+    with pytest.raises(ValueError):
+        fit_weibull_stream(bad, stats=summarize(good))
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from api import analyze_batch
+from failurerate import calculate_failure_rate, calculate_mtbf
+from groupfit import fit_weibull_codes
+from ingest import FailureLogStats
+from lifedata import LifeData
+
+FAILURES = [550, 480, 680, 790, 860, 620]
+
+
+def _weighted():
+    # 20 units: six failures and 14 survivors at 1000 hours in one row.
+    return LifeData(FAILURES + [1000], [1] * 6 + [0], [1] * 6 + [14])
+
+
+def _expanded():
+    times = np.r_[FAILURES, np.full(14, 1000.0)]
+    return times, np.r_[np.ones(6), np.zeros(14)]
+
+
+@pytest.mark.parametrize("flags", [[256, 1], [-1, 1], [1.5, 1], [np.nan, 1], np.array([4, 1], np.uint8)])
+def test_invalid_flags_are_rejected(flags):
+    with pytest.raises(ValueError):
+        LifeData([100.0, 200.0], flags)
+
+
+def test_metrics_take_life_data():
+    times, _ = _expanded()
+    assert calculate_mtbf(_weighted()) == calculate_mtbf(times.sum(), 6)
+    assert calculate_failure_rate(_weighted()) == calculate_failure_rate(times.sum(), 6)
+
+
+def test_group_fit_takes_life_data():
+    times, events = _expanded()
+    weighted = fit_weibull_codes(np.zeros(7, dtype=np.intp), _weighted())
+    expanded = fit_weibull_codes(np.zeros(20, dtype=np.intp), times, events)
+    assert weighted["n"].iat[0] == 20 and weighted["n_failures"].iat[0] == 6
+    assert weighted["beta"].iat[0] == pytest.approx(expanded["beta"].iat[0], rel=1e-12)
+
+
+def test_stream_stats_take_life_data():
+    times, events = _expanded()
+    weighted = FailureLogStats().update(_weighted())
+    expanded = FailureLogStats().update(times, events)
+    assert vars(weighted) == pytest.approx(vars(expanded))
+
+
+def test_api_takes_life_data_and_weights():
+    times, events = _expanded()
+    expanded, from_data, from_json = analyze_batch(
+        [
+            {"times": times.tolist(), "censored": (1 - events).tolist(), "warranty_period": 200},
+            {"data": _weighted(), "warranty_period": 200},
+            {
+                "times": FAILURES + [1000],
+                "censored": [0] * 6 + [1],
+                "weights": [1] * 6 + [14],
+                "warranty_period": 200,
+            },
+        ]
+    )
+    for result in (from_data, from_json):
+        assert result["units"] == 20 and result["failing_units"] == 6
+        assert result["mtbf"] == pytest.approx(expanded["mtbf"])
+        assert result["weibull_fit"]["beta"] == pytest.approx(expanded["weibull_fit"]["beta"], rel=1e-12)
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from modelstore import ModelStore
+from weibullfit import fit_weibull_2p, fit_weibull_3p
+
+FAILURES = [550, 480, 680, 790, 860, 620]
+CENSORED = [1000, 1000]
+
+
+def test_fit_or_load_hits_same_asset_distribution_and_window():
+    store = ModelStore()
+    first = store.fit_or_load("A", FAILURES, CENSORED)
+    again = store.fit_or_load("A", list(reversed(FAILURES)), CENSORED)
+    assert again.id == first.id
+    assert first.distribution == "Weibull_2P"
+    assert store.stats()["models"] == 1
+
+
+def test_fit_or_load_misses_across_assets():
+    store = ModelStore()
+    a = store.fit_or_load("A", FAILURES, CENSORED)
+    b = store.fit_or_load("B", FAILURES, CENSORED)
+    assert (a.asset, b.asset) == ("A", "B")
+    assert b.id != a.id
+    assert store.fit_or_load("A", FAILURES, CENSORED).id == a.id
+    assert store.stats()["models"] == 2
+
+
+def test_fit_or_load_misses_across_distributions_and_windows():
+    store = ModelStore()
+    two = store.fit_or_load("A", FAILURES, CENSORED)
+    three = store.fit_or_load("A", FAILURES, CENSORED, fitter=fit_weibull_3p)
+    assert three.id != two.id
+    assert three.distribution == "Weibull_3P"
+    assert store.fit_or_load("A", FAILURES, CENSORED, fitter=fit_weibull_3p).id == three.id
+
+    windowed = store.fit_or_load("A", FAILURES, CENSORED, window=(0.0, 720.0))
+    assert windowed.id not in (two.id, three.id)
+    assert (windowed.window_start, windowed.window_end) == (0.0, 720.0)
+    assert store.fit_or_load("A", FAILURES, CENSORED).id == two.id
+    assert store.stats()["models"] == 3
+
+
+def test_unbounded_window_round_trips():
+    store = ModelStore()
+    model = store.fit_or_load("A", FAILURES)
+    assert (model.window_start, model.window_end) == (-np.inf, np.inf)
+    assert store.find(model.fingerprint, "Weibull_2P", "A", (-np.inf, np.inf)).id == model.id
+
+
+def test_fit_or_load_rejects_a_fit_that_did_not_converge():
+    store = ModelStore()
+    with pytest.raises(ValueError):
+        store.fit_or_load("A", FAILURES, CENSORED, fitter=lambda f, c: fit_weibull_2p(f, c, max_iter=1))
+    assert store.stats()["models"] == 0
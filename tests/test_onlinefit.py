@@ -0,0 +1,56 @@
+import math
+
+import numpy as np
+import pytest
+
+from onlinefit import IncrementalWeibull
+from weibullfit import fit_weibull_2p
+
+
+@pytest.mark.parametrize("keep_history", [True, False])
+def test_degenerate_first_batch(keep_history):
+    est = IncrementalWeibull(keep_history=keep_history)
+    first = est.update([100.0])
+    assert not first.converged and math.isnan(first.beta)
+    fit = est.update([200.0])
+    ref = fit_weibull_2p([100.0, 200.0])
+    assert fit.converged
+    assert fit.beta == pytest.approx(ref.beta, rel=1e-9)
+    assert fit.alpha == pytest.approx(ref.alpha, rel=1e-9)
+
+
+def test_stream_matches_refit():
+    rng = np.random.default_rng(0)
+    est = IncrementalWeibull()
+    failures, censored = [], []
+    for _ in range(40):
+        scale = 10 ** rng.uniform(0, 4)
+        f = rng.weibull(rng.uniform(0.5, 4), rng.integers(0, 4)) * scale
+        c = rng.weibull(1.0, rng.integers(0, 4)) * scale
+        failures += list(f)
+        censored += list(c)
+        fit = est.update(f, c)
+    ref = fit_weibull_2p(failures, censored)
+    assert fit.converged
+    assert fit.beta == pytest.approx(ref.beta, rel=1e-9)
+    assert fit.alpha == pytest.approx(ref.alpha, rel=1e-9)
+    assert fit.loglik == pytest.approx(ref.loglik, rel=1e-9)
+
+
+def test_stream_without_history():
+    # Mixed scales move beta a long way; the series-only estimate must stay
+    # finite and close to a full refit.
+    for seed in range(10):
+        rng = np.random.default_rng(seed)
+        est = IncrementalWeibull(keep_history=False)
+        failures, censored = [], []
+        for _ in range(30):
+            scale = 10 ** rng.uniform(0, 4)
+            f = rng.weibull(rng.uniform(0.5, 4), rng.integers(0, 4)) * scale
+            c = rng.weibull(1.0, rng.integers(0, 4)) * scale
+            failures += list(f)
+            censored += list(c)
+            fit = est.update(f, c)
+        ref = fit_weibull_2p(failures, censored)
+        assert fit.converged
+        assert fit.beta == pytest.approx(ref.beta, rel=1e-2)
@@ -0,0 +1,72 @@
+# Reference values are from reliability.Fitters.Fit_Weibull_2P and
+# Fit_Weibull_3P on the same data.
+
+import numpy as np
+import pytest
+
+from weibullfit import fit_weibull_2p, fit_weibull_3p
+
+FAILURES = [550, 480, 680, 790, 860, 620]
+CENSORED = [1000] * 14
+
+
+def _simulated(seed):
+    # beta = 2, gamma = 50, 20% censored at the 80th percentile.
+    rng = np.random.default_rng(seed)
+    t = 50 + 100 * rng.weibull(2.0, 30)
+    c = np.quantile(t, 0.8)
+    return t[t <= c], np.full((t > c).sum(), c)
+
+
+def test_2p_matches_reliability():
+    fit = fit_weibull_2p(FAILURES, CENSORED)
+    assert fit.converged
+    assert fit.alpha == pytest.approx(1466.1893, rel=1e-5)
+    assert fit.beta == pytest.approx(2.600754, rel=1e-5)
+    assert fit.loglik == pytest.approx(-51.816269, rel=1e-7)
+
+
+@pytest.mark.parametrize("failures", [[500], [500, 500, 500]])
+def test_2p_needs_two_distinct_failures(failures):
+    with pytest.raises(ValueError):
+        fit_weibull_2p(failures, [1000])
+
+
+@pytest.mark.parametrize(
+    "seed, alpha, beta, gamma, loglik",
+    [
+        (0, 114.45889, 1.857339, 40.814434, -133.551253),
+        (1, 89.553529, 1.725324, 62.490058, -128.373483),
+        (3, 99.405058, 2.237915, 42.675014, -127.648214),
+    ],
+)
+def test_3p_matches_reliability(seed, alpha, beta, gamma, loglik):
+    # Seed 0 has a higher likelihood with gamma just below the smallest
+    # failure and beta < 1; the fit must find the interior maximum instead.
+    fit = fit_weibull_3p(*_simulated(seed))
+    assert fit.gamma == pytest.approx(gamma, rel=1e-3)
+    assert fit.beta == pytest.approx(beta, rel=1e-3)
+    assert fit.alpha == pytest.approx(alpha, rel=1e-3)
+    assert fit.loglik == pytest.approx(loglik, abs=1e-3)
+
+
+def test_3p_without_interior_maximum_falls_back_to_2p():
+    # The likelihood only rises towards gamma = 480 with beta < 1.
+    fit = fit_weibull_3p(FAILURES, CENSORED)
+    assert fit.gamma == 0.0
+    assert fit.beta == pytest.approx(2.600754, rel=1e-5)
+    assert fit.beta >= 1
+
+
+def test_3p_search_bound_is_not_taken_as_the_mle():
+    # The profile likelihood still rises at the search bound 95 (half the
+    # smallest failure gap below 100), where beta is about 1.13.
+    failures = [100, 120, 130, 180, 200, 260, 300]
+    fit = fit_weibull_3p(failures)
+    assert fit.gamma == 0.0
+    assert fit.beta == pytest.approx(fit_weibull_2p(failures).beta, rel=1e-12)
+
+
+def test_3p_needs_three_distinct_failures():
+    with pytest.raises(ValueError):
+        fit_weibull_3p([500, 500, 600], [1000])
@@ -0,0 +1,413 @@
+# Maximum likelihood fitting of the Weibull distribution to failure and
+# right censored data without going through reliability.Fitters.
+#
+# The 2P fit profiles the scale parameter out of the likelihood: for a given
+# shape beta the MLE of alpha is closed form, so only the one dimensional
+# profile score in beta has to be solved. That is done with a safeguarded
+# Newton iteration using the analytic derivative. The 3P fit searches the
+# location parameter gamma over the 2P profile likelihood of the shifted data.
+#
+# The solver works on "ragged" groups (one group id per observation) so the
+# same code fits one data set or many independent data sets in lockstep.
+
+from collections import namedtuple
+
+import numpy as np
+
+from lifedata import LifeData
+
+WeibullFit = namedtuple(
+    "WeibullFit",
+    [
+        "alpha",
+        "beta",
+        "gamma",
+        "alpha_SE",
+        "beta_SE",
+        "Cov_alpha_beta",
+        "loglik",
+        "n_iter",
+        "converged",
+    ],
+)
+WeibullFit.__doc__ = """
+Result of a Weibull maximum likelihood fit.
+
+The SE and covariance fields come from the inverse of the observed Fisher
+information in (alpha, beta) and use the same names as the reliability
+package so a WeibullFit can be handed to its plotting functions.
+"""
+
+
+def _group_sum(group, values, n_groups):
+    return np.bincount(group, weights=values, minlength=n_groups)
+
+
+def _unpack(failures, right_censored=None):
+    """
+    Combines failures and right censored times into single arrays.
+
+    Parameters:
+    failures (array_like or LifeData): Failure times, or a LifeData holding
+    failures and right censored rows (right_censored is then ignored).
+    right_censored (array_like or None): Right censored (survivor) times.
+
+    Returns:
+    tuple: (times, events, weights) where events is 1.0 for failures and 0.0
+    for right censored times and weights counts the units per row.
+    """
+    if isinstance(failures, LifeData):
+        times, events, weights = failures.right_censored_arrays()
+    else:
+        failures = np.asarray(failures, dtype=np.float64).ravel()
+        if right_censored is None:
+            right_censored = np.empty(0)
+        right_censored = np.asarray(right_censored, dtype=np.float64).ravel()
+        times = np.concatenate((failures, right_censored))
+        events = np.concatenate((np.ones(failures.size), np.zeros(right_censored.size)))
+        weights = np.ones(times.size)
+    if np.any(times <= 0):
+        raise ValueError("All failure and right censored times must be positive.")
+    return times, events, weights
+
+
+def _pack(failures, right_censored=None):
+    """
+    As _unpack, but returns one row per unit: (times, events), with weighted
+    LifeData rows repeated.
+    """
+    times, events, weights = _unpack(failures, right_censored)
+    if isinstance(failures, LifeData) and failures.weight is not None:
+        times = np.repeat(times, failures.weight)
+        events = np.repeat(events, failures.weight)
+    return times, events
+
+
+def _menon_start(var_fail_logt):
+    """
+    Menon's moment estimate of beta from the variance of the failure log
+    times, used as the Newton starting point.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        beta = np.pi / np.sqrt(6.0 * np.asarray(var_fail_logt, dtype=np.float64))
+    beta = np.where(np.isfinite(beta) & (beta > 0), beta, 1.0)
+    return np.clip(beta, 0.05, 50.0)
+
+
+def _newton_step(beta, lo, hi, active, s0, s1, s2, mean_fail_x):
+    """
+    One safeguarded Newton step on the profile score in beta.
+
+    s0, s1 and s2 are the sums of w * exp(beta * x) * x**k for k = 0, 1, 2,
+    where x is the shifted log time, and mean_fail_x is the mean x of the
+    failures. The score is increasing in beta, so its sign narrows the
+    bracket [lo, hi]; steps that leave the bracket are replaced by bisection
+    (or doubling while hi is still infinite).
+
+    Returns:
+    tuple: (new beta, new lo, new hi).
+    """
+    m1 = s1 / s0
+    score = m1 - 1.0 / beta - mean_fail_x
+    slope = s2 / s0 - m1 * m1 + 1.0 / beta**2
+
+    lo = np.where(active & (score < 0), beta, lo)
+    hi = np.where(active & (score > 0), beta, hi)
+    step = beta - score / slope
+    bad = ~np.isfinite(step) | (step <= lo) | (step >= hi)
+    fallback = np.where(np.isfinite(hi), 0.5 * (lo + hi), 2.0 * beta)
+    return np.where(bad, fallback, step), lo, hi
+
+
+def _covariance(r, alpha, beta, sz, szu, szu2):
+    """
+    Inverse of the observed information in (alpha, beta).
+
+    r is the number of failures and sz, szu, szu2 are the sums of
+    w * z * u**k for k = 0, 1, 2 with u = log(t / alpha) and z = exp(beta * u).
+
+    Returns:
+    tuple: (var_alpha, var_beta, cov_alpha_beta).
+    """
+    h_aa = (r * beta - beta * (beta + 1.0) * sz) / alpha**2
+    h_bb = -r / beta**2 - szu2
+    h_ab = (sz - r + beta * szu) / alpha
+    det = h_aa * h_bb - h_ab**2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return -h_bb / det, -h_aa / det, h_ab / det
+
+
+def _profile_mle(logt, event, weight, group, n_groups, beta0=None, tol=1e-10, max_iter=100):
+    """
+    Solves the Weibull 2P profile likelihood for every group at once.
+
+    Parameters:
+    logt (ndarray): Natural log of each observation time.
+    event (ndarray): 1.0 for failures, 0.0 for right censored observations.
+    weight (ndarray): Number of units each observation represents.
+    group (ndarray): Integer group id of each observation, in [0, n_groups).
+    n_groups (int): Number of groups.
+    beta0 (ndarray or None): Starting shape per group. None uses Menon's
+    moment estimate from the failure log times.
+    tol (float): Relative convergence tolerance on beta.
+    max_iter (int): Maximum number of Newton iterations.
+
+    Returns:
+    dict: Per-group arrays alpha, beta, loglik, alpha_SE, beta_SE,
+    Cov_alpha_beta, n_iter, converged and n_failures. Groups without
+    failures are returned as nan and not converged, as are groups that did
+    not converge within max_iter.
+    """
+    wd = weight * event
+    r = _group_sum(group, wd, n_groups)
+    has_failures = r > 0
+    r_safe = np.where(has_failures, r, 1.0)
+
+    # Shift log times by the group maximum so exp(beta * x) never overflows.
+    c = np.full(n_groups, -np.inf)
+    np.maximum.at(c, group, logt)
+    c = np.where(np.isfinite(c), c, 0.0)
+    x = logt - c[group]
+    mean_fail_x = _group_sum(group, wd * x, n_groups) / r_safe
+
+    if beta0 is None:
+        var_fail_x = _group_sum(group, wd * x * x, n_groups) / r_safe - mean_fail_x**2
+        beta = _menon_start(var_fail_x)
+    else:
+        beta = np.broadcast_to(np.asarray(beta0, dtype=np.float64), (n_groups,)).copy()
+
+    lo = np.zeros(n_groups)
+    hi = np.full(n_groups, np.inf)
+    active = has_failures.copy()
+    n_iter = np.zeros(n_groups, dtype=np.int64)
+
+    # Each step only touches the rows of the groups still iterating: ids are
+    # those groups and local the position of each kept row's group in ids.
+    rows = np.flatnonzero(active[group])
+    ids = np.flatnonzero(active)
+    local = np.searchsorted(ids, group[rows])
+    for _ in range(max_iter):
+        if not ids.size:
+            break
+        xr = x[rows]
+        b = beta[ids]
+        e = weight[rows] * np.exp(b[local] * xr)
+        ex = e * xr
+        s0 = _group_sum(local, e, ids.size)
+        s1 = _group_sum(local, ex, ids.size)
+        s2 = _group_sum(local, ex * xr, ids.size)
+        step, lo[ids], hi[ids] = _newton_step(b, lo[ids], hi[ids], True, s0, s1, s2, mean_fail_x[ids])
+
+        done = np.abs(step - b) <= tol * b
+        beta[ids] = step
+        n_iter[ids] += 1
+        if done.any():
+            active[ids[done]] = False
+            keep = ~done[local]
+            rows = rows[keep]
+            ids = ids[~done]
+            local = np.searchsorted(ids, group[rows])
+
+    converged = has_failures & ~active
+    # Groups without an estimate are evaluated at beta = 1 and masked below.
+    beta = np.where(converged, beta, 1.0)
+
+    # Closed form scale and the observed information at (alpha, beta).
+    e = weight * np.exp(beta[group] * x)
+    s0 = _group_sum(group, e, n_groups)
+    log_alpha = c + np.log(np.where(has_failures, s0 / r_safe, 1.0)) / beta
+    u = logt - log_alpha[group]
+    z = weight * np.exp(beta[group] * u)
+    sz = _group_sum(group, z, n_groups)
+    szu = _group_sum(group, z * u, n_groups)
+    szu2 = _group_sum(group, z * u * u, n_groups)
+    sum_fail_logt = _group_sum(group, wd * logt, n_groups)
+
+    alpha = np.exp(log_alpha)
+    loglik = r * np.log(beta) - r * beta * log_alpha + (beta - 1.0) * sum_fail_logt - sz
+    var_alpha, var_beta, cov_ab = _covariance(r, alpha, beta, sz, szu, szu2)
+
+    # Groups that did not converge (e.g. one distinct failure time, where
+    # beta grows without bound) have no usable estimate either.
+    nan = np.where(converged, 1.0, np.nan)
+    return {
+        "alpha": alpha * nan,
+        "beta": beta * nan,
+        "loglik": loglik * nan,
+        "alpha_SE": np.sqrt(np.abs(var_alpha)) * nan,
+        "beta_SE": np.sqrt(np.abs(var_beta)) * nan,
+        "Cov_alpha_beta": cov_ab * nan,
+        "n_iter": n_iter,
+        "converged": converged,
+        "n_failures": r,
+    }
+
+
+def _single(times, events, beta0=None, tol=1e-10, max_iter=100, weights=None):
+    group = np.zeros(times.size, dtype=np.intp)
+    if weights is None:
+        weights = np.ones(times.size)
+    return _profile_mle(np.log(times), events, weights, group, 1, beta0, tol, max_iter)
+
+
+def fit_weibull_2p(failures, right_censored=None, tol=1e-10, max_iter=100):
+    """
+    Fits a two parameter Weibull distribution by maximum likelihood.
+
+    Parameters:
+    failures (array_like or LifeData): Failure times, or a LifeData with
+    failures and right censored rows (optionally weighted).
+    right_censored (array_like or None): Right censored (survivor) times.
+    tol (float): Relative convergence tolerance on beta.
+    max_iter (int): Maximum number of Newton iterations.
+
+    Returns:
+    WeibullFit: Fitted alpha and beta (gamma is 0), their standard errors
+    and covariance, the log-likelihood and convergence information.
+    """
+    times, events, weights = _unpack(failures, right_censored)
+    if np.unique(times[events == 1]).size < 2:
+        raise ValueError("At least two distinct failure times are required to fit a Weibull distribution.")
+    res = _single(times, events, tol=tol, max_iter=max_iter, weights=weights)
+    return WeibullFit(
+        alpha=float(res["alpha"][0]),
+        beta=float(res["beta"][0]),
+        gamma=0.0,
+        alpha_SE=float(res["alpha_SE"][0]),
+        beta_SE=float(res["beta_SE"][0]),
+        Cov_alpha_beta=float(res["Cov_alpha_beta"][0]),
+        loglik=float(res["loglik"][0]),
+        n_iter=int(res["n_iter"][0]),
+        converged=bool(res["converged"][0]),
+    )
+
+
+def _shifted_profiles(times, events, gammas, weights):
+    """
+    Evaluates the 2P profile fit of times - gamma for every gamma in one
+    lockstep solve, treating each gamma as its own group.
+    """
+    k = gammas.size
+    shifted = times[None, :] - gammas[:, None]
+    keep = shifted > 0
+    group = np.broadcast_to(np.arange(k)[:, None], shifted.shape)[keep]
+    logt = np.log(shifted[keep])
+    ev = np.broadcast_to(events, shifted.shape)[keep]
+    w = np.broadcast_to(weights, shifted.shape)[keep]
+    return _profile_mle(logt, ev, w, group, k)
+
+
+def _profile_slope(times, events, weights, gamma, alpha, beta):
+    """
+    Derivative of the profile log-likelihood with respect to gamma. By the
+    envelope theorem it equals the partial derivative of the 3P
+    log-likelihood at the profiled (alpha, beta).
+    """
+    shifted = times - gamma
+    keep = shifted > 0
+    shifted = shifted[keep]
+    ev = events[keep]
+    w = weights[keep]
+    return -(beta - 1.0) * np.sum(w * ev / shifted) + (beta / alpha) * np.sum(
+        w * (shifted / alpha) ** (beta - 1.0)
+    )
+
+
+def _gamma_upper(distinct):
+    """
+    Upper end of the gamma search for sorted distinct failure times: half the
+    smallest failure gap below the first failure. Closer to it the
+    likelihood grows without bound when beta < 1.
+    """
+    return distinct[0] - 0.5 * np.diff(distinct).min()
+
+
+def fit_weibull_3p(failures, right_censored=None, tol=1e-10, max_iter=100, n_grid=16):
+    """
+    Fits a three parameter Weibull distribution by maximum likelihood.
+
+    gamma is searched between 0 and just below the smallest failure time. A
+    coarse grid of candidate gammas is solved in one vectorized pass, the best
+    local maximum of the profile likelihood is picked (ignoring a rise
+    towards the smallest failure, where the likelihood is unbounded when
+    beta < 1) and its stationary point is solved with brentq on the analytic
+    slope. As in reliability.Fitters.Fit_Weibull_3P, a fitted gamma below 0.01
+    falls back to the 2P fit with gamma = 0, as does data without any local
+    maximum. The SE fields are those
+    of the 2P fit to the gamma-adjusted data.
+
+    Parameters:
+    failures (array_like or LifeData): Failure times, or a LifeData with
+    failures and right censored rows (optionally weighted).
+    right_censored (array_like or None): Right censored (survivor) times.
+    tol (float): Relative convergence tolerance on beta.
+    max_iter (int): Maximum number of Newton iterations.
+    n_grid (int): Number of gamma values in the initial grid.
+
+    Returns:
+    WeibullFit: Fitted alpha, beta and gamma with the same fields as
+    fit_weibull_2p.
+    """
+    # Imported here so that 2P-only users (fr.py, failurerate.py) don't pay
+    # for scipy.optimize at startup.
+    from scipy.optimize import brentq
+
+    times, events, weights = _unpack(failures, right_censored)
+    distinct = np.unique(times[events == 1])
+    if distinct.size < 3:
+        raise ValueError(
+            "At least three distinct failure times are required to fit a Weibull_3P distribution."
+        )
+    # The upper end is only a search bound: it counts as a peak only if the
+    # profile likelihood is no longer rising there.
+    upper = _gamma_upper(distinct)
+    if upper <= 0.01:
+        return fit_weibull_2p(failures, right_censored, tol=tol, max_iter=max_iter)
+
+    grid = np.linspace(0.0, upper, n_grid)
+    profiles = _shifted_profiles(times, events, grid, weights)
+    loglik = np.where(np.isfinite(profiles["loglik"]), profiles["loglik"], -np.inf)
+    padded = np.r_[-np.inf, loglik, -np.inf]
+    peak = (loglik >= padded[:-2]) & (loglik >= padded[2:]) & np.isfinite(loglik)
+    peak[-1] &= (
+        _profile_slope(times, events, weights, upper, profiles["alpha"][-1], profiles["beta"][-1])
+        <= 0
+    )
+    if not peak.any():
+        return fit_weibull_2p(failures, right_censored, tol=tol, max_iter=max_iter)
+    best = int(np.argmax(np.where(peak, loglik, -np.inf)))
+    gamma = grid[best]
+
+    def slope(g):
+        keep = times > g
+        res = _single(
+            times[keep] - g, events[keep], beta0=profiles["beta"][best], tol=tol, weights=weights[keep]
+        )
+        return _profile_slope(times, events, weights, g, res["alpha"][0], res["beta"][0])
+
+    # A positive slope to the left of the best grid point and a negative one to
+    # the right bracket the interior maximum; at gamma = 0 the bound is the
+    # MLE (and falls back to 2P below).
+    for lo, hi in ((grid[max(best - 1, 0)], gamma), (gamma, grid[min(best + 1, n_grid - 1)])):
+        if hi > lo and slope(lo) > 0 > slope(hi):
+            gamma = brentq(slope, lo, hi, xtol=upper * 1e-12)
+            break
+
+    if gamma < 0.01:
+        return fit_weibull_2p(failures, right_censored, tol=tol, max_iter=max_iter)
+
+    keep = times > gamma
+    res = _single(
+        times[keep] - gamma, events[keep], tol=tol, max_iter=max_iter, weights=weights[keep]
+    )
+    return WeibullFit(
+        alpha=float(res["alpha"][0]),
+        beta=float(res["beta"][0]),
+        gamma=float(gamma),
+        alpha_SE=float(res["alpha_SE"][0]),
+        beta_SE=float(res["beta_SE"][0]),
+        Cov_alpha_beta=float(res["Cov_alpha_beta"][0]),
+        loglik=float(res["loglik"][0]),
+        n_iter=int(res["n_iter"][0]),
+        converged=bool(res["converged"][0]),
+    )
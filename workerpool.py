@@ -0,0 +1,78 @@
+# Bounded process pool for the CPU-heavy parts of a request (fitting and
+# rendering), shared by every thread of the web server.
+#
+# Work runs in separate processes so a busy fit or render does not hold the
+# GIL against the request threads. The number of jobs queued or running is
+# capped: once max_pending jobs are in flight, submit() waits up to
+# queue_timeout seconds for a slot and then raises PoolBusy so the server can
+# shed load instead of queueing without bound.
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+
+class PoolBusy(RuntimeError):
+    """Raised when no slot frees up in the worker pool within the timeout."""
+
+
+class WorkerPool:
+    """
+    Lazily started, bounded ProcessPoolExecutor.
+
+    Parameters:
+    max_workers (int or None): Number of worker processes. Defaults to the
+    number of CPUs.
+    max_pending (int or None): Maximum jobs queued or running at once.
+    Defaults to 4 * max_workers.
+    queue_timeout (float): Seconds to wait for a free slot before PoolBusy.
+    """
+
+    def __init__(self, max_workers=None, max_pending=None, queue_timeout=10.0):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 4 * self.max_workers
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn, because forking a multi-threaded server process can
+                # deadlock on locks held by other threads.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Submits fn(*args, **kwargs) to the pool.
+
+        Returns:
+        Future: The pending result.
+        """
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise PoolBusy(f"{self.max_pending} jobs already pending")
+        try:
+            future = self._get_executor().submit(fn, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, fn, *args, **kwargs):
+        """
+        Runs fn(*args, **kwargs) in the pool and waits for its result.
+        """
+        return self.submit(fn, *args, **kwargs).result()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None